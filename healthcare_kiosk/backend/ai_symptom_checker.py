@@ -1,35 +1,342 @@
 # backend/ai_symptom_checker.py
-import joblib
+import asyncio
+import hashlib
 import numpy as np
-from openvino.runtime import Core
 import os
+from threading import Lock, Thread
+import time
+from .batching import MicroBatcher
+from .cache import LRUCache, MISSING
+from .featurizer import file_hash
+from .inference_backends import create_backend, openvino_compile_config
+from .model_bundle import BUNDLE_FILE, ModelBundle
+from .model_registry import active_version, list_versions, version_dir
+from .quantization import int8_variant
+from .settings import (
+    INFERENCE_BACKEND, INFERENCE_BATCH_MAX_SIZE, INFERENCE_BATCH_MAX_WAIT_MS,
+    OPENVINO_PROFILE, OPENVINO_NUM_STREAMS, OPENVINO_NUM_THREADS, OPENVINO_PRECISION,
+    OPENVINO_CACHE_DIR, OPENVINO_INFER_REQUESTS,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S, MODEL_VARIANT, INT8_MIN_AGREEMENT,
+)
 
 # ------------------ MODEL FILES ------------------
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
-VECTORIZER_PATH = os.path.join(MODEL_DIR, "vectorizer.pkl")
-CLASSES_PATH = os.path.join(MODEL_DIR, "classes.pkl")
-XML_PATH = os.path.join(MODEL_DIR, "symptom_model.xml")
-BIN_PATH = os.path.join(MODEL_DIR, "symptom_model.bin")
-
-# ------------------ LOAD COMPONENTS ------------------
-vectorizer = joblib.load(VECTORIZER_PATH)
-classes = joblib.load(CLASSES_PATH)
-
-ie = Core()
-model_ir = ie.read_model(model=XML_PATH, weights=BIN_PATH)
-compiled_model = ie.compile_model(model=model_ir, device_name="CPU")
-input_layer = compiled_model.input(0)
-output_layer = compiled_model.output(0)
+# Versions trained by train_and_convert_model.py ship a bundle; older ones the pickles
+VECTORIZER_FILE = "vectorizer.pkl"
+FEATURIZER_FILE = "featurizer.npz"
+CLASSES_FILE = "classes.pkl"
+XML_FILE = "symptom_model.xml"
+BIN_FILE = "symptom_model.bin"
+ONNX_FILE = "symptom_model.onnx"
+
+def _artifact_hash(paths) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            digest.update(file_hash(path).encode())
+    return digest.hexdigest()[:16]
+
+# ------------------ LOADED MODEL ------------------
+class SymptomModel:
+    """One model version with its featurizer, labels and inference engine.
+
+    Requests take a reference to the active model when they start, so a
+    reload can swap in a new version while they finish on the old one.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self.model_dir = version_dir(version)
+        paths = {name: os.path.join(self.model_dir, name) for name in
+                 (BUNDLE_FILE, VECTORIZER_FILE, FEATURIZER_FILE, CLASSES_FILE, XML_FILE, BIN_FILE, ONNX_FILE)}
+        self.variant = "fp"
+        if MODEL_VARIANT == "int8":
+            if INFERENCE_BACKEND != "openvino":
+                print(f"[WARNING] The INT8 variant needs the openvino backend, using {INFERENCE_BACKEND} as is")
+            else:
+                int8_paths, reason = int8_variant(self.model_dir, INT8_MIN_AGREEMENT)
+                if int8_paths:
+                    paths[XML_FILE], paths[BIN_FILE] = int8_paths
+                    self.variant = "int8"
+                else:
+                    print(f"[WARNING] Not serving the INT8 variant of {version}: {reason}")
+        # Identifies the model files, so cached predictions never outlive them
+        self.model_hash = _artifact_hash(paths.values())
+        # Memory-mapped, no unpickling for versions trained with a bundle
+        bundle = ModelBundle.from_dir(self.model_dir)
+        self.featurizer = bundle.featurizer()
+        self.classes = bundle.classes
+        self.engine = create_backend(
+            INFERENCE_BACKEND,
+            self.featurizer.n_features,
+            xml_path=paths[XML_FILE],
+            bin_path=paths[BIN_FILE],
+            onnx_path=paths[ONNX_FILE],
+            openvino_config=openvino_compile_config(
+                OPENVINO_PROFILE, OPENVINO_NUM_STREAMS, OPENVINO_NUM_THREADS, OPENVINO_PRECISION
+            ),
+            openvino_cache_dir=OPENVINO_CACHE_DIR,
+            infer_requests=OPENVINO_INFER_REQUESTS,
+            num_threads=OPENVINO_NUM_THREADS,
+            layers=bundle.layers,
+        )
+        self.batcher = MicroBatcher(
+            self.engine.submit,
+            max_batch_size=INFERENCE_BATCH_MAX_SIZE,
+            max_wait_ms=INFERENCE_BATCH_MAX_WAIT_MS,
+            name=f"symptom-inference-{version}",
+        ) if INFERENCE_BATCH_MAX_SIZE > 0 else None
+        self.loaded_at = time.time()
+        self._feature_tables = {}
+        self._feature_tables_lock = Lock()
+        print(f"[INFO] Symptom model {version} ({self.variant}) loaded with the {self.engine.name} backend")
+
+    # Per symptom vocabulary: row ``sid`` holds the idf-weighted term counts
+    # that the featurizer produces for that symptom's text
+    def _symptom_feature_table(self, matcher) -> np.ndarray:
+        table = self._feature_tables.get(matcher.fingerprint)
+        if table is None:
+            with self._feature_tables_lock:
+                table = self._feature_tables.get(matcher.fingerprint)
+                if table is None:
+                    table = self.featurizer.symptom_table(matcher.symptoms)
+                    self._feature_tables.clear()  # only the current vocabulary is ever needed
+                    self._feature_tables[matcher.fingerprint] = table
+        return table
+
+    def featurize_symptom_ids(self, symptom_ids, matcher) -> np.ndarray:
+        """L2-normalized float32 input row for extracted symptom ids.
+
+        Same features as ``featurizer.transform([" ".join(names)])`` without
+        building and re-tokenizing the joined string.
+        """
+        return self.featurizer.transform_symptom_ids(self._symptom_feature_table(matcher), symptom_ids)
+
+    def submit_row(self, X: np.ndarray):
+        """Future for the model output of a single (1, features) row"""
+        if self.batcher:
+            return self.batcher.submit(X)
+        # Rows may live in reusable featurizer buffers
+        return self.engine.submit(X.copy())
+
+    def label(self, result: np.ndarray) -> str:
+        prediction_index = int(np.argmax(result))
+        return self.classes[prediction_index]
+
+    def predict_row(self, X: np.ndarray) -> str:
+        return self.label(self.submit_row(X).result())
+
+    def warm(self):
+        """Run one inference so the first real request doesn't pay for lazy setup"""
+        self.predict_row(np.zeros((1, self.featurizer.n_features), dtype=np.float32))
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "variant": self.variant,
+            "model_hash": self.model_hash,
+            "loaded_at": self.loaded_at,
+            "engine": self.engine.stats(),
+            "batching": self.batcher.stats() if self.batcher else None,
+        }
+
+def _load_startup_model() -> SymptomModel:
+    """The ACTIVE version, or else the newest version that loads, so one broken version can't stop the backend"""
+    version = None
+    try:
+        version = active_version()
+        return SymptomModel(version)
+    except Exception as e:
+        error = e
+        print(f"[ERROR] Loading the ACTIVE model failed: {e}")
+    for fallback in reversed(list_versions()):
+        if fallback == version:
+            continue
+        try:
+            model = SymptomModel(fallback)
+        except Exception as e:
+            print(f"[ERROR] Loading model {fallback} failed: {e}")
+            continue
+        print(f"[WARNING] Serving model {fallback} instead of {version}")
+        return model
+    raise error
+
+_active_model = _load_startup_model()
+_reload_lock = Lock()
+_reload_status = {"state": "idle", "version": None, "error": None}
+
+def active_model() -> SymptomModel:
+    return _active_model
+
+def reload_model(version: str = None, warm=None) -> SymptomModel:
+    """Load, warm and then atomically activate ``version`` (default: the ACTIVE file).
+
+    ``warm`` is called with the new model before it starts serving. Requests
+    already holding the old model finish on it; its batcher is then drained.
+    """
+    global _active_model
+    with _reload_lock:
+        version = version or active_version()
+        # Version directories are immutable, so the same version means no change
+        if version == _active_model.version:
+            return _active_model
+        _reload_status.update(state="loading", version=version, error=None)
+        try:
+            model = SymptomModel(version)
+            model.warm()
+            if warm:
+                warm(model)
+        except Exception as e:
+            _reload_status.update(state="failed", error=str(e))
+            print(f"[ERROR] Loading model {version} failed, keeping {_active_model.version}: {e}")
+            raise
+        old_model, _active_model = _active_model, model
+        old_model.close()
+        _reload_status.update(state="idle")
+        print(f"[INFO] Now serving model {model.version} (was {old_model.version})")
+        return model
+
+def model_status() -> dict:
+    return {"active": _active_model.version, "reload": dict(_reload_status)}
+
+def start_model_watcher(interval_s: float, warm=None) -> Thread:
+    """Poll the ACTIVE file and reload whenever it names a different version"""
+    def watch():
+        failed_version = None
+        while True:
+            time.sleep(interval_s)
+            try:
+                version = active_version()
+            except Exception as e:
+                print(f"[WARNING] Model watcher: {e}")
+                continue
+            if version in (_active_model.version, failed_version):
+                continue
+            try:
+                reload_model(version, warm)
+                failed_version = None
+            except Exception:
+                # Already logged; don't retry a broken version until ACTIVE changes again
+                failed_version = version
+
+    thread = Thread(target=watch, name="model-watcher", daemon=True)
+    thread.start()
+    return thread
+
+# ------------------ PREDICTION CACHE ------------------
+# (model hash, sorted symptom names) -> diagnosis; the model output depends only on that set
+PREDICTION_CACHE = LRUCache(PREDICTION_CACHE_SIZE, name="predictions", ttl=PREDICTION_CACHE_TTL_S)
+
+def _prediction_key(symptom_ids, matcher, model: SymptomModel) -> tuple:
+    return (model.model_hash, tuple(sorted(matcher.names(symptom_ids))))
+
+def prewarm_prediction_cache(symptom_sets, matcher, model: SymptomModel = None) -> int:
+    """Cache predictions for comma-separated ``Diagnosis.symptoms`` strings in one batch.
+
+    Returns the number of symptom sets cached; sets with symptoms missing from
+    the current vocabulary are skipped.
+    """
+    model = model or _active_model
+    keys, rows = {}, []
+    for symptoms in symptom_sets:
+        ids = {matcher.symptom_ids.get(s.strip()) for s in symptoms.split(",")}
+        if not ids or None in ids:
+            continue
+        key = _prediction_key(ids, matcher, model)
+        if key not in keys:
+            keys[key] = len(rows)
+            rows.append(model.featurize_symptom_ids(sorted(ids), matcher).copy())
+    if not rows:
+        return 0
+    outputs = model.engine.infer(np.vstack(rows))
+    for key, row in keys.items():
+        PREDICTION_CACHE.put(key, model.label(outputs[row]))
+    return len(keys)
+
+def inference_stats() -> dict:
+    model = _active_model
+    stats = model.stats()
+    stats["prediction_cache"] = PREDICTION_CACHE.stats()
+    stats["reload"] = dict(_reload_status)
+    return stats
 
 # ------------------ INFERENCE FUNCTION ------------------
-def predict_condition(symptom_text: str) -> str:
+def featurize_symptom_ids(symptom_ids, matcher) -> np.ndarray:
+    return _active_model.featurize_symptom_ids(symptom_ids, matcher)
+
+def predict_condition(symptom_text: str, model: SymptomModel = None) -> str:
+    model = model or _active_model
     try:
-        X = vectorizer.transform([symptom_text])
-        X = X.toarray().astype(np.float32)
-        result = compiled_model([X])[output_layer]
-        prediction_index = int(np.argmax(result))
-        return classes[prediction_index]
+        return model.predict_row(model.featurizer.transform_one(symptom_text))
+    except Exception as e:
+        print(f"[SymptomChecker Error] {e}")
+        return "Unable to predict condition"
+
+def predict_condition_from_ids(symptom_ids, matcher, model: SymptomModel = None) -> str:
+    """Fast path for /diagnose: symptom ids from the extractor straight to the model"""
+    model = model or _active_model
+    try:
+        symptom_ids = sorted(set(symptom_ids))
+        key = _prediction_key(symptom_ids, matcher, model)
+        diagnosis = PREDICTION_CACHE.get(key)
+        if diagnosis is MISSING:
+            diagnosis = model.predict_row(model.featurize_symptom_ids(symptom_ids, matcher))
+            PREDICTION_CACHE.put(key, diagnosis)
+        return diagnosis
+    except Exception as e:
+        print(f"[SymptomChecker Error] {e}")
+        return "Unable to predict condition"
+
+def predict_conditions_from_ids(symptom_id_sets, matcher, model: SymptomModel = None) -> list:
+    """Diagnoses for many symptom id sets; the uncached ones share one model call"""
+    model = model or _active_model
+    diagnoses = [None] * len(symptom_id_sets)
+    pending, rows = {}, []
+    try:
+        for i, symptom_ids in enumerate(symptom_id_sets):
+            symptom_ids = sorted(set(symptom_ids))
+            key = _prediction_key(symptom_ids, matcher, model)
+            diagnosis = PREDICTION_CACHE.get(key)
+            if diagnosis is not MISSING:
+                diagnoses[i] = diagnosis
+                continue
+            if key not in pending:
+                pending[key] = []
+                rows.append(model.featurize_symptom_ids(symptom_ids, matcher).copy())
+            pending[key].append(i)
+        if rows:
+            outputs = model.engine.infer(np.vstack(rows))
+            for output, (key, positions) in zip(outputs, pending.items()):
+                diagnosis = model.label(output)
+                PREDICTION_CACHE.put(key, diagnosis)
+                for i in positions:
+                    diagnoses[i] = diagnosis
+    except Exception as e:
+        print(f"[SymptomChecker Error] {e}")
+        # Sets already answered (e.g. from the cache) keep their diagnosis
+        return [diagnosis or "Unable to predict condition" for diagnosis in diagnoses]
+    return diagnoses
+
+async def predict_condition_from_ids_async(symptom_ids, matcher, model: SymptomModel = None) -> str:
+    """Awaitable fast path: waits for the infer request pool without blocking the event loop"""
+    model = model or _active_model
+    try:
+        symptom_ids = sorted(set(symptom_ids))
+        key = _prediction_key(symptom_ids, matcher, model)
+        diagnosis = PREDICTION_CACHE.get(key)
+        if diagnosis is not MISSING:
+            return diagnosis
+        X = model.featurize_symptom_ids(symptom_ids, matcher)
+        if model.batcher:
+            result = await asyncio.wrap_future(model.batcher.submit(X))
+        else:
+            result = await model.engine.infer_async(X.copy())
+        diagnosis = model.label(result)
+        PREDICTION_CACHE.put(key, diagnosis)
+        return diagnosis
     except Exception as e:
         print(f"[SymptomChecker Error] {e}")
         return "Unable to predict condition"
-    
\ No newline at end of file
@@ -0,0 +1,139 @@
+# backend/batching.py
+from collections import Counter
+from concurrent.futures import Future
+from functools import partial
+import queue
+import threading
+import time
+import numpy as np
+
+# Queued by close() to stop the worker after the rows ahead of it
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collects concurrent single-row requests into one batched inference.
+
+    Callers ``submit`` a feature row and get a Future for its output row. A
+    worker thread takes the first waiting row, keeps collecting until
+    ``max_batch_size`` rows or ``max_wait_ms`` have passed, hands them to
+    ``submit_batch`` as one (n, features) array and fans the rows of the
+    result back out to the waiting Futures.
+
+    ``submit_batch`` returns a Future itself, so the worker can start
+    collecting the next batch while earlier ones are still running.
+    """
+
+    def __init__(self, submit_batch, max_batch_size: int = 32, max_wait_ms: float = 2.0, name: str = "batcher"):
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._submit_batch = submit_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+        self._batch_sizes = Counter()
+
+    def submit(self, row: np.ndarray) -> Future:
+        """Queue one (features,) or (1, features) row; the Future resolves to its output row"""
+        # Rows may come from reusable featurizer buffers, so keep a private copy
+        row = np.array(row, dtype=np.float32).reshape(1, -1)
+        future = Future()
+        with self._lock:
+            if not self._closed:
+                self._queue.put((row[0], future))
+                self._ensure_worker()
+                return future
+        # Stragglers after close() run unbatched
+        self._submit_batch(row).add_done_callback(partial(_fan_out, [future]))
+        return future
+
+    def close(self):
+        """Stop the worker once the rows already queued have been submitted"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._worker is not None:
+                self._queue.put(_STOP)
+
+    def infer(self, row: np.ndarray) -> np.ndarray:
+        return self.submit(row).result()
+
+    def _ensure_worker(self):
+        # Called with self._lock held
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._worker.start()
+
+    def _collect(self):
+        """Next batch, and whether close() was reached while collecting it"""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._collect()
+            if not batch:
+                continue
+            futures = [future for _, future in batch]
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+            try:
+                batch_future = self._submit_batch(np.stack([row for row, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    _resolve(future, error=e)
+                continue
+            batch_future.add_done_callback(partial(_fan_out, futures))
+
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        rows = sum(size * count for size, count in sizes.items())
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": round(rows / batches, 2) if batches else 0.0,
+            "batch_size_distribution": sizes,
+        }
+
+
+def _resolve(future: Future, output=None, error=None):
+    """Settle one caller's Future; one that was cancelled (a caller timed out) is skipped"""
+    if not future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(output)
+
+def _fan_out(futures, batch_future: Future):
+    try:
+        outputs = batch_future.result()
+    except Exception as e:
+        for future in futures:
+            _resolve(future, error=e)
+        return
+    for future, output in zip(futures, outputs):
+        _resolve(future, output)
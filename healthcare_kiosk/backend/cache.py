@@ -0,0 +1,75 @@
+# backend/cache.py
+from collections import OrderedDict
+from threading import Lock
+import time
+
+# Returned by LRUCache.get when a key is absent, so None can be cached
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with hit/miss/eviction counters.
+
+    With a positive ``ttl`` (seconds) entries also expire that long after they
+    were stored; an expired entry counts as a miss.
+    """
+
+    def __init__(self, maxsize: int, name: str = "cache", ttl: float = 0):
+        self.name = name
+        self.maxsize = max(0, maxsize)
+        self.ttl = max(0.0, ttl)
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires_at and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,158 @@
+# backend/database/async_benchmark.py
+"""Request concurrency of the sync (threadpool) and async (aiosqlite) database paths.
+
+    python -m backend.database.async_benchmark --concurrency 10 100 400 --seconds 5
+
+Each run gets a fresh scratch database (healthcare.db is never touched) and
+``concurrency`` clients on one event loop, each issuing the /login, /ehr,
+/vitals and /diagnose database calls in a loop. "sync" runs crud on
+FastAPI's threadpool with a SessionLocal per request, as a ``def`` endpoint
+does; "async" awaits async_crud on an AsyncSession, as the endpoints do now;
+"write-behind" is "async" with vitals and diagnoses group-committed through
+a WriteBehindQueue (KIOSK_WRITE_BEHIND_MAX_BATCH_SIZE > 0).
+
+SQLite calls are short and mostly hold the GIL, so the async path does not
+add database throughput; each aiosqlite call is a thread hop. What it frees
+is the threadpool (40 slots by default), which the sync path fills and which
+inference offloading and the remaining ``def`` endpoints share. A probe
+runs an empty job on the threadpool every PROBE_INTERVAL_S and reports how
+long it waited.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.concurrency import run_in_threadpool
+from . import async_crud, crud
+from ..settings import DB_PROFILE, EHR_PAGE_SIZE
+from .database import STORAGE_PROFILES, create_async_db_engine, create_db_engine, init_db
+from .write_behind import WriteBehindQueue
+
+# Request mix: reads outnumber writes at a kiosk
+OPERATIONS = ["login", "ehr", "ehr", "vitals", "diagnose"]
+PROBE_INTERVAL_S = 0.01
+
+
+def _sync_request(Session, op, patient):
+    patient_id, aadhaar = patient
+    with Session() as db:
+        if op == "login":
+            return crud.get_patient_by_aadhaar(db, aadhaar)
+        if op == "ehr":
+            return crud.get_patient_ehr(db, patient_id, EHR_PAGE_SIZE)
+        if op == "vitals":
+            return crud.add_vitals(db, patient_id, 170.0, 65.0, "120/80", 72)
+        return crud.add_diagnosis(db, patient_id, "fever,headache", "flu", "bench")
+
+async def _async_request(AsyncSession, op, patient, writer=None):
+    patient_id, aadhaar = patient
+    async with AsyncSession() as db:
+        if op == "login":
+            return await async_crud.get_patient_by_aadhaar(db, aadhaar)
+        if op == "ehr":
+            return await async_crud.get_patient_ehr(db, patient_id, EHR_PAGE_SIZE)
+        if op == "vitals":
+            return await async_crud.add_vitals(db, patient_id, 170.0, 65.0, "120/80", 72, writer=writer)
+        return await async_crud.add_diagnosis(db, patient_id, "fever,headache", "flu", "bench", writer=writer)
+
+async def _client(request, patients, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            ok = await request(rng.choice(OPERATIONS), rng.choice(patients)) is not None
+        except Exception:
+            ok = False
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors[0] += not ok
+
+async def _threadpool_probe(deadline, waits):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        waits.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL_S)
+
+async def run_mode(mode: str, concurrency: int, seconds: float, patients: int, profile: str,
+                   batch_size: int = 256, max_wait_ms: float = 5.0) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.db')
+        engine = create_db_engine(f"sqlite:///{path}", profile)
+        init_db(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with Session() as db:
+            seeded = [(crud.create_patient(db, f"{i:012d}", f"Patient {i}", 20 + i % 60, "Female").id, f"{i:012d}")
+                      for i in range(patients)]
+
+        async_engine, writer = None, None
+        if mode == "sync":
+            async def request(op, patient):
+                return await run_in_threadpool(_sync_request, Session, op, patient)
+        else:
+            async_engine = create_async_db_engine(f"sqlite+aiosqlite:///{path}", profile)
+            AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+            if mode == "write-behind":
+                writer = WriteBehindQueue(create_async_db_engine(f"sqlite+aiosqlite:///{path}", profile, pool_size=1),
+                                          batch_size, max_wait_ms)
+                writer.start()
+
+            async def request(op, patient):
+                return await _async_request(AsyncSession, op, patient, writer)
+
+        latencies, errors, waits = [], [0], []
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(_threadpool_probe(deadline, waits),
+                             *[_client(request, seeded, deadline, latencies, errors, i)
+                               for i in range(concurrency)])
+        writer_stats = None
+        if writer is not None:
+            await writer.close()
+            writer_stats = writer.stats()
+        if async_engine is not None:
+            await async_engine.dispose()
+        engine.dispose()
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests_per_s": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2) if latencies else None,
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2) if latencies else None,
+        "errors": errors[0],
+        "threadpool_p95_ms": round(float(np.percentile(waits, 95)), 2) if waits else None,
+        "mean_batch_size": writer_stats["mean_batch_size"] if writer_stats else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sync and async database paths")
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"], choices=["sync", "async", "write-behind"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[10, 100, 400])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--profile", default=DB_PROFILE, choices=sorted(STORAGE_PROFILES))
+    parser.add_argument("--batch-size", type=int, default=256, help="write-behind inserts per commit")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="write-behind wait for a fuller batch")
+    args = parser.parse_args()
+
+    rows = []
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            # crud logs every call; keep the report readable
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                rows.append(asyncio.run(run_mode(mode, concurrency, args.seconds, args.patients, args.profile,
+                                                args.batch_size, args.max_wait_ms)))
+
+    print(f"profile {args.profile}, {args.seconds:g} s per run, request mix {'/'.join(OPERATIONS)}")
+    print(f"{'mode':<12} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7} "
+          f"{'threadpool p95':>15} {'batch':>6}")
+    for row in rows:
+        print(f"{row['mode']:<12} {row['concurrency']:>8} {row['requests_per_s']:>9} "
+              f"{row['p50_ms'] or '-':>9} {row['p95_ms'] or '-':>9} {row['errors']:>7} "
+              f"{row['threadpool_p95_ms'] or '-':>15} {row['mean_batch_size'] or '-':>6}")
@@ -0,0 +1,138 @@
+"""Async counterparts of the crud functions the request path uses.
+
+Statements, errors and results are the ones crud builds, executed on an
+AsyncSession (aiosqlite), so a request waiting on SQLite holds no threadpool slot.
+Vitals and diagnoses can instead go through a WriteBehindQueue (``writer``),
+which commits them in batches.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from . import models
+from .crud import (
+    PatientNotFound, PatientAlreadyExists, _violates,
+    patient_insert, vitals_insert, diagnosis_insert, ehr_section_query, ehr_summary_query, ehr_data,
+)
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+async def _insert(db: AsyncSession, statement, writer=None):
+    """Row of an INSERT ... RETURNING, committed on its own or in the writer's next batch"""
+    if writer is not None:
+        return await writer.execute(statement)
+    row = (await db.execute(statement)).one()
+    await db.commit()
+    return row
+
+# -------------------- Patient --------------------
+
+async def create_patient(db: AsyncSession, aadhaar: str, name: str, age: int, gender: str):
+    """Raises PatientAlreadyExists if the Aadhaar is already registered"""
+    try:
+        patient = (await db.execute(patient_insert(aadhaar, name, age, gender))).one()
+        await db.commit()
+        print(f"[SUCCESS] Created patient: {patient.name} (ID: {patient.id})")
+        return patient
+
+    except IntegrityError as e:
+        await db.rollback()
+        if _violates(e, "UNIQUE"):
+            print(f"[ERROR] Patient with Aadhaar {aadhaar} already exists")
+            raise PatientAlreadyExists(aadhaar)
+        print(f"[ERROR] Database integrity error: {e}")
+        return None
+    except Exception as e:
+        await db.rollback()
+        print(f"[ERROR] Failed to create patient: {e}")
+        return None
+
+async def get_patient_by_aadhaar(db: AsyncSession, aadhaar: str):
+    try:
+        patient = await db.scalar(select(models.Patient).filter_by(aadhaar=aadhaar).limit(1))
+        if patient:
+            print(f"[SUCCESS] Found patient: {patient.name}")
+        else:
+            print(f"[INFO] No patient found with Aadhaar: {aadhaar}")
+        return patient
+    except Exception as e:
+        print(f"[ERROR] Failed to retrieve patient: {e}")
+        return None
+
+async def get_patient_by_name(db: AsyncSession, name: str):
+    try:
+        return await db.scalar(select(models.Patient).where(models.Patient.name == name).limit(1))
+    except Exception as e:
+        print(f"[ERROR] Failed to retrieve patient by name: {e}")
+        return None
+
+# -------------------- Vitals --------------------
+
+async def add_vitals(db: AsyncSession, patient_id: int, height: float, weight: float, bp: str, pulse: int,
+                     writer=None):
+    """Raises PatientNotFound; the returned row also carries ``patient_name``"""
+    try:
+        vitals = await _insert(db, vitals_insert(patient_id, height, weight, bp, pulse), writer)
+        print(f"[SUCCESS] Added vitals for patient ID {patient_id}")
+        return vitals
+
+    except IntegrityError as e:
+        await db.rollback()
+        if _violates(e, "FOREIGN KEY"):
+            print(f"[ERROR] Patient with ID {patient_id} not found")
+            raise PatientNotFound(patient_id)
+        print(f"[ERROR] Failed to add vitals: {e}")
+        return None
+    except Exception as e:
+        await db.rollback()
+        print(f"[ERROR] Failed to add vitals: {e}")
+        return None
+
+# -------------------- Diagnosis --------------------
+
+async def add_diagnosis(db: AsyncSession, patient_id: int, symptoms: str, result: str,
+                        model_version: Optional[str] = None, writer=None):
+    """Raises PatientNotFound"""
+    try:
+        diagnosis = await _insert(db, diagnosis_insert(patient_id, symptoms, result, model_version), writer)
+        print(f"[SUCCESS] Added diagnosis for patient ID {patient_id}")
+        return diagnosis
+
+    except IntegrityError as e:
+        await db.rollback()
+        if _violates(e, "FOREIGN KEY"):
+            print(f"[ERROR] Patient with ID {patient_id} not found")
+            raise PatientNotFound(patient_id)
+        print(f"[ERROR] Failed to add diagnosis: {e}")
+        return None
+    except Exception as e:
+        await db.rollback()
+        print(f"[ERROR] Failed to add diagnosis: {e}")
+        return None
+
+# -------------------- EHR --------------------
+
+async def get_patient_ehr(db: AsyncSession, patient_id: int, limit: Optional[int] = None,
+                          vitals_before: Optional[str] = None, diagnoses_before: Optional[str] = None,
+                          vitals_since: Optional[datetime] = None, vitals_until: Optional[datetime] = None,
+                          diagnoses_since: Optional[datetime] = None,
+                          diagnoses_until: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Same pages, cursors and summary as crud.get_patient_ehr"""
+    # A malformed cursor raises InvalidCursor for the caller to report
+    vitals_query = ehr_section_query(models.Vitals, patient_id, limit, vitals_before, vitals_since, vitals_until)
+    diagnoses_query = ehr_section_query(models.Diagnosis, patient_id, limit, diagnoses_before,
+                                        diagnoses_since, diagnoses_until)
+    try:
+        row = (await db.execute(ehr_summary_query(patient_id))).first()
+        if not row:
+            print(f"[ERROR] Patient with ID {patient_id} not found")
+            return None
+        vitals = (await db.scalars(vitals_query)).all()
+        diagnoses = (await db.scalars(diagnoses_query)).all()
+        ehr = ehr_data(row, vitals, diagnoses, limit)
+
+        print(f"[SUCCESS] Retrieved EHR for patient: {row[0].name}")
+        return ehr
+
+    except Exception as e:
+        print(f"[ERROR] Failed to retrieve EHR: {e}")
+        return None
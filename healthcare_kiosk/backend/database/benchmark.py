@@ -0,0 +1,93 @@
+# backend/database/benchmark.py
+"""Read/write throughput of the SQLite storage profiles.
+
+    python -m backend.database.benchmark --profiles default performance --readers 8 --writers 4
+
+Each profile gets a fresh scratch database in a temp directory (healthcare.db
+is never touched). Writer threads do what /vitals and /diagnose do, through
+crud; reader threads load the first EHR page like /ehr. Failed calls, e.g. "database is
+locked", count as errors.
+"""
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import threading
+import time
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+from . import crud
+from ..settings import EHR_PAGE_SIZE
+from .database import STORAGE_PROFILES, create_db_engine, init_db
+
+
+def _seed(Session, patients: int) -> list:
+    with Session() as db:
+        return [crud.create_patient(db, f"{i:012d}", f"Patient {i}", 20 + i % 60, "Female").id
+                for i in range(patients)]
+
+def _worker(Session, patient_ids, op, deadline, results, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    with Session() as db:
+        while time.perf_counter() < deadline:
+            patient_id = rng.choice(patient_ids)
+            start = time.perf_counter()
+            if op == "write":
+                ok = crud.add_vitals(db, patient_id, 170.0, 65.0, "120/80", 72) is not None
+                ok = ok and crud.add_diagnosis(db, patient_id, "fever,headache", "flu", "bench") is not None
+            else:
+                ok = crud.get_patient_ehr(db, patient_id, EHR_PAGE_SIZE) is not None
+                db.expire_all()  # read from the database each time, not the identity map
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+    results.append((op, latencies, errors))
+
+def run_profile(profile: str, readers: int, writers: int, seconds: float, patients: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", profile)
+        init_db(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        patient_ids = _seed(Session, patients)
+
+        results = []
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=_worker, args=(Session, patient_ids, op, deadline, results, i))
+                   for i, op in enumerate(["read"] * readers + ["write"] * writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    stats = {"profile": profile}
+    for op in ("read", "write"):
+        latencies = [ms for kind, values, _ in results if kind == op for ms in values]
+        stats[f"{op}s_per_s"] = round(len(latencies) / seconds, 1)
+        stats[f"{op}_p95_ms"] = round(float(np.percentile(latencies, 95)), 2) if latencies else None
+        stats[f"{op}_errors"] = sum(errors for kind, _, errors in results if kind == op)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite storage profiles")
+    parser.add_argument("--profiles", nargs="+", default=["default", "performance"], choices=sorted(STORAGE_PROFILES))
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--patients", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = []
+    for profile in args.profiles:
+        # crud logs every call; keep the report readable
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            rows.append(run_profile(profile, args.readers, args.writers, args.seconds, args.patients))
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g} s per profile")
+    print(f"{'profile':<12} {'reads/s':>9} {'read p95':>9} {'writes/s':>9} {'write p95':>10} {'errors':>7}")
+    for row in rows:
+        print(f"{row['profile']:<12} {row['reads_per_s']:>9} {row['read_p95_ms'] or '-':>9} "
+              f"{row['writes_per_s']:>9} {row['write_p95_ms'] or '-':>10} "
+              f"{row['read_errors'] + row['write_errors']:>7}")
@@ -0,0 +1,205 @@
+# backend/database/bulk_export.py
+"""Streaming export of patients, vitals and diagnoses.
+
+    python -m backend.database.bulk_export vitals -o vitals.csv
+    python -m backend.database.bulk_export all -o extract.ndjson.gz --since 2025-01-01 --until 2025-04-01
+
+Rows are read with ``yield_per`` in batches of BULK_EXPORT_YIELD_PER and
+each batch is serialized into one output chunk, so SQLite steps its cursor
+as the output is written and nothing holds more than one batch, however
+large the tables are. The export opens its own read transaction (pysqlite
+only begins one before writes), so "all" sees one snapshot of the three
+tables. Under WAL writers carry on meanwhile; in rollback-journal mode they
+wait for the export, like they wait for any reader.
+
+Columns (the ones bulk_import reads back, plus ids):
+    patients   id, aadhaar, name, age, gender
+    vitals     id, patient_id, height, weight, bp, pulse, bmi, timestamp
+    diagnoses  id, patient_id, symptoms, result, model_version, timestamp
+
+"all" is NDJSON only: patients, then vitals, then diagnoses, each object
+tagged with its "type". ``since``/``until`` select vitals and diagnoses with
+since <= timestamp < until, as /ehr does, and the patients with any record
+in that range. Rows come in id order; date-filtered diagnoses in timestamp
+order, walking ix_diagnosis_timestamp.
+"""
+import argparse
+import csv
+from datetime import datetime, timezone
+import io
+import json
+import sys
+import time
+import zlib
+from typing import Iterator, Optional, Tuple
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session, sessionmaker
+from . import models
+from .database import SessionLocal, create_db_engine
+from ..settings import BULK_EXPORT_YIELD_PER
+
+KINDS = ("patients", "vitals", "diagnoses", "all")
+FORMATS = ("ndjson", "csv")
+# "type" of each record in an "all" export
+RECORD_TYPES = {"patients": "patient", "vitals": "vitals", "diagnoses": "diagnosis"}
+
+COLUMNS = {
+    "patients": (models.Patient.id, models.Patient.aadhaar, models.Patient.name,
+                 models.Patient.age, models.Patient.gender),
+    "vitals": (models.Vitals.id, models.Vitals.patient_id, models.Vitals.height_cm.label("height"),
+               models.Vitals.weight_kg.label("weight"), models.Vitals.blood_pressure.label("bp"),
+               models.Vitals.pulse, models.Vitals.bmi, models.Vitals.timestamp),
+    "diagnoses": (models.Diagnosis.id, models.Diagnosis.patient_id, models.Diagnosis.symptoms,
+                  models.Diagnosis.result, models.Diagnosis.model_version, models.Diagnosis.timestamp),
+}
+FIELDS = {kind: [column.key for column in columns] for kind, columns in COLUMNS.items()}
+
+# ------------------ QUERIES ------------------
+def _in_range(model, since: Optional[datetime], until: Optional[datetime]) -> list:
+    criteria = []
+    if since:
+        criteria.append(model.timestamp >= since)
+    if until:
+        criteria.append(model.timestamp < until)
+    return criteria
+
+def export_query(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Rows of one table to export; timestamps are naive UTC"""
+    if kind == "patients":
+        query = select(*COLUMNS[kind]).order_by(models.Patient.id)
+        if since or until:
+            # One probe of each (patient_id, timestamp) index per patient
+            visited = [exists().where(model.patient_id == models.Patient.id, *_in_range(model, since, until))
+                       for model in (models.Vitals, models.Diagnosis)]
+            query = query.where(visited[0] | visited[1])
+        return query
+    model = models.Vitals if kind == "vitals" else models.Diagnosis
+    criteria = _in_range(model, since, until)
+    query = select(*COLUMNS[kind]).where(*criteria)
+    if criteria and model is models.Diagnosis:
+        return query.order_by(model.timestamp, model.id)
+    return query.order_by(model.id)
+
+def iter_batches(db: Session, kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 yield_per: int = BULK_EXPORT_YIELD_PER) -> Iterator[Tuple[str, list]]:
+    """(table, rows) for every ``yield_per`` rows fetched; rows are tuples in FIELDS order"""
+    tables = list(COLUMNS) if kind == "all" else [kind]
+    for table in tables:
+        query = export_query(table, since, until).execution_options(yield_per=max(1, yield_per))
+        timestamp = FIELDS[table].index("timestamp") if "timestamp" in FIELDS[table] else None
+        for partition in db.execute(query).partitions():
+            rows = [tuple(row) for row in partition]
+            if timestamp is not None:
+                rows = [row[:timestamp] + (row[timestamp].isoformat() if row[timestamp] else None,)
+                        + row[timestamp + 1:] for row in rows]
+            yield table, rows
+
+# ------------------ SERIALIZATION ------------------
+def ndjson_chunks(batches, tagged: bool = False) -> Iterator[bytes]:
+    """One chunk of JSON lines per batch; ``tagged`` adds each record's "type\""""
+    for table, rows in batches:
+        fields = FIELDS[table]
+        tag = {"type": RECORD_TYPES[table]} if tagged else {}
+        yield "".join(json.dumps({**tag, **dict(zip(fields, row))}, ensure_ascii=False) + "\n"
+                      for row in rows).encode("utf-8")
+
+def csv_chunks(batches, fields) -> Iterator[bytes]:
+    """The header row, then one chunk of CSV rows per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    for _, rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Nothing to export: just the header
+        yield buffer.getvalue().encode("utf-8")
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream on the fly into one gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+# ------------------ EXPORT ------------------
+def check_export(kind: str, fmt: str):
+    """Raises ValueError for a kind/format combination that cannot be exported"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {list(KINDS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {list(FORMATS)}")
+    if kind == "all" and fmt == "csv":
+        raise ValueError("kind 'all' mixes three tables and is only exported as NDJSON")
+
+def stream_export(kind: str, fmt: str = "ndjson", since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, compress: bool = False,
+                  yield_per: int = BULK_EXPORT_YIELD_PER, session_factory=SessionLocal) -> Iterator[bytes]:
+    """The export as byte chunks; the session and its read transaction live as long as the iterator"""
+    check_export(kind, fmt)
+
+    def generate():
+        with session_factory() as db:
+            # Otherwise each table's SELECT would start a snapshot of its own
+            db.connection().exec_driver_sql("BEGIN")
+            batches = iter_batches(db, kind, since, until, yield_per)
+            chunks = ndjson_chunks(batches, kind == "all") if fmt == "ndjson" else csv_chunks(batches, FIELDS[kind])
+            yield from (gzip_chunks(chunks) if compress else chunks)
+    return generate()
+
+def export_filename(kind: str, fmt: str, compress: bool = False) -> str:
+    name = f"{kind}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}.{fmt}"
+    return f"{name}.gz" if compress else name
+
+def parse_datetime(value: str) -> datetime:
+    """ISO 8601 date or date-time as naive UTC; raises ValueError"""
+    parsed = datetime.fromisoformat(value)
+    # Stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export patients, vitals or diagnoses as NDJSON or CSV")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    parser.add_argument("--format", choices=FORMATS, help="default: csv for .csv[.gz] output, otherwise ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output (default for .gz files)")
+    parser.add_argument("--since", type=parse_datetime, help="ISO 8601, inclusive")
+    parser.add_argument("--until", type=parse_datetime, help="ISO 8601, exclusive")
+    parser.add_argument("--yield-per", type=int, default=BULK_EXPORT_YIELD_PER, help="rows fetched per batch")
+    parser.add_argument("--db", help="SQLite file to export from; default: the kiosk database")
+    args = parser.parse_args()
+
+    compress = args.gzip or args.output.endswith(".gz")
+    fmt = args.format or ("csv" if args.output.removesuffix(".gz").endswith(".csv") else "ndjson")
+    try:
+        check_export(args.kind, fmt)
+    except ValueError as e:
+        parser.error(str(e))
+
+    session_factory = SessionLocal
+    if args.db:
+        session_factory = sessionmaker(autocommit=False, autoflush=False,
+                                       bind=create_db_engine(f"sqlite:///{args.db}"))
+
+    start = time.perf_counter()
+    written = 0
+    output = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in stream_export(args.kind, fmt, args.since, args.until, compress, args.yield_per,
+                                   session_factory):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    # stdout may be the export itself
+    print(f"[SUCCESS] Exported {args.kind} as {fmt}{' (gzip)' if compress else ''}: "
+          f"{written} bytes in {time.perf_counter() - start:.2f} s", file=sys.stderr)
@@ -0,0 +1,271 @@
+# backend/database/bulk_import.py
+"""Streaming bulk import of patients, vitals and diagnoses.
+
+    python -m backend.database.bulk_import patients clinic_patients.csv
+    python -m backend.database.bulk_import vitals clinic_vitals.ndjson --chunk-size 2000
+
+CSV (with a header row) or NDJSON is read one row at a time and handled in
+chunks: each chunk resolves its Aadhaar numbers with one lookup, is validated
+with the API's schemas and is inserted with one executemany in its own
+transaction, so memory stays bounded by the chunk size. Rejected rows (failed
+validation, unknown patient, Aadhaar already registered) are skipped and
+written with the reason to a rejects file, one JSON object per line.
+
+Columns:
+    patients   aadhaar, name, age, gender
+    vitals     aadhaar or patient_id, height, weight, bp, pulse[, timestamp]
+    diagnoses  aadhaar or patient_id, symptoms, result[, model_version, timestamp]
+
+Timestamps are ISO 8601; without one a row gets the import time.
+"""
+import argparse
+import csv
+from datetime import datetime, timezone
+import io
+import json
+import sys
+import time
+from typing import Dict, Iterator, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+from . import crud, models
+from .database import SessionLocal, create_db_engine, init_db
+from ..schemas import PatientCreate, VitalsCreate, DiagnosisCreate, check_vitals
+from ..settings import BULK_IMPORT_CHUNK_SIZE
+
+KINDS = {"patients": models.Patient, "vitals": models.Vitals, "diagnoses": models.Diagnosis}
+FORMATS = ("csv", "ndjson")
+
+
+class RejectedRow(ValueError):
+    """A row that is skipped and written to the rejects file"""
+
+# ------------------ READING ------------------
+def detect_format(name: str, content_type: str = "") -> str:
+    """"csv" for .csv files / text/csv, otherwise "ndjson\""""
+    if name.lower().endswith(".csv") or "csv" in content_type.lower():
+        return "csv"
+    return "ndjson"
+
+def read_rows(stream, fmt: str) -> Iterator[Tuple[int, dict, Optional[str]]]:
+    """(line number, row, parse error) for each record of a text stream"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Blank cells are missing values, as absent keys are in NDJSON
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, {"raw": line.rstrip("\n")}, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield line_number, row, None
+        else:
+            yield line_number, {"raw": row}, "Each line must be a JSON object"
+
+def _chunks(rows, size: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# ------------------ VALIDATION ------------------
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+def _timestamp(row: dict, now: datetime) -> datetime:
+    value = row.get("timestamp")
+    if value in (None, ""):
+        return now
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise RejectedRow(f"timestamp: invalid ISO 8601 value {value!r}")
+    # Stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def patient_lookup_query(aadhaars, ids):
+    """(id, aadhaar) of the patients with any of these Aadhaar numbers or ids"""
+    return (select(models.Patient.id, models.Patient.aadhaar)
+            .where(or_(models.Patient.aadhaar.in_(aadhaars), models.Patient.id.in_(ids))))
+
+def _lookup_patients(db: Session, rows) -> Tuple[Dict[str, int], set]:
+    """Aadhaar -> id, and the ids that exist, for every patient a chunk references"""
+    aadhaars = {str(row["aadhaar"]) for _, row, _ in rows if row.get("aadhaar") not in (None, "")}
+    ids = set()
+    for _, row, _ in rows:
+        try:
+            ids.add(int(row["patient_id"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    if not aadhaars and not ids:
+        return {}, set()
+    found = db.execute(patient_lookup_query(aadhaars, ids)).all()
+    return {aadhaar: patient_id for patient_id, aadhaar in found}, {patient_id for patient_id, _ in found}
+
+def _patient_id(row: dict, by_aadhaar: Dict[str, int], existing_ids: set) -> int:
+    if row.get("patient_id") not in (None, ""):
+        try:
+            patient_id = int(row["patient_id"])
+        except (TypeError, ValueError):
+            raise RejectedRow(f"patient_id: not an integer: {row['patient_id']!r}")
+        if patient_id not in existing_ids:
+            raise RejectedRow("Patient not found")
+        return patient_id
+    if row.get("aadhaar") in (None, ""):
+        raise RejectedRow("aadhaar or patient_id is required")
+    patient_id = by_aadhaar.get(str(row["aadhaar"]))
+    if patient_id is None:
+        raise RejectedRow("Patient not found")
+    return patient_id
+
+def _fields(row: dict, names) -> dict:
+    # Absent fields are left out so the schema reports them as required
+    return {name: row[name] for name in names if name in row}
+
+def _patient_record(row: dict, registered: set) -> dict:
+    patient = PatientCreate(**_fields(row, ("aadhaar", "name", "age", "gender")))
+    if patient.aadhaar in registered:
+        raise RejectedRow("Patient with this Aadhaar already registered")
+    registered.add(patient.aadhaar)
+    return patient.model_dump()
+
+def _vitals_record(row: dict, patient_id: int, now: datetime) -> dict:
+    vitals = VitalsCreate(patient_id=patient_id, **_fields(row, ("height", "weight", "bp", "pulse")))
+    check_vitals(vitals)
+    record = crud.vitals_values(vitals.patient_id, vitals.height, vitals.weight, vitals.bp, vitals.pulse)
+    record["timestamp"] = _timestamp(row, now)
+    return record
+
+def _diagnosis_record(row: dict, patient_id: int, now: datetime) -> dict:
+    diagnosis = DiagnosisCreate(patient_id=patient_id, **_fields(row, ("symptoms", "result", "model_version")))
+    record = diagnosis.model_dump()
+    record["timestamp"] = _timestamp(row, now)
+    return record
+
+def _validate_chunk(db: Session, kind: str, rows):
+    """(line, row, record) to insert and (line, row, reason) rejects"""
+    now = datetime.now(timezone.utc)
+    if kind == "patients":
+        aadhaars = {str(row.get("aadhaar")) for _, row, _ in rows}
+        registered = set(db.scalars(select(models.Patient.aadhaar).where(models.Patient.aadhaar.in_(aadhaars))))
+    else:
+        by_aadhaar, existing_ids = _lookup_patients(db, rows)
+
+    accepted, rejected = [], []
+    for line, row, parse_error in rows:
+        try:
+            if parse_error:
+                raise RejectedRow(parse_error)
+            if kind == "patients":
+                record = _patient_record(row, registered)
+            else:
+                patient_id = _patient_id(row, by_aadhaar, existing_ids)
+                build = _vitals_record if kind == "vitals" else _diagnosis_record
+                record = build(row, patient_id, now)
+            accepted.append((line, row, record))
+        except (ValueError, TypeError) as e:  # RejectedRow and ValidationError included
+            rejected.append((line, row, _error_message(e)))
+    return accepted, rejected
+
+# ------------------ IMPORT ------------------
+def _insert_chunk(db: Session, kind: str, accepted) -> list:
+    """Insert the chunk with one executemany; rejects of the rows that still fail"""
+    table = KINDS[kind]
+    try:
+        db.execute(insert(table), [record for _, _, record in accepted])
+        db.commit()
+        return []
+    except IntegrityError:
+        # A concurrent write made a row invalid since the lookup; find it row by row
+        db.rollback()
+    rejected = []
+    for line, row, record in accepted:
+        try:
+            db.execute(insert(table), [record])
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            rejected.append((line, row, str(e.orig)))
+    return rejected
+
+def import_stream(kind: str, stream, fmt: str, rejects_path: str,
+                  chunk_size: int = BULK_IMPORT_CHUNK_SIZE, session_factory=SessionLocal) -> dict:
+    """Import every row of a text stream; the rejects file is only created if a row is rejected"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {sorted(KINDS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {list(FORMATS)}")
+
+    start = time.perf_counter()
+    stats = {"kind": kind, "rows": 0, "inserted": 0, "rejected": 0, "chunks": 0, "rejects_file": None}
+    rejects = None
+    try:
+        with session_factory() as db:
+            for chunk in _chunks(read_rows(stream, fmt), max(1, chunk_size)):
+                accepted, rejected = _validate_chunk(db, kind, chunk)
+                if accepted:
+                    failed = _insert_chunk(db, kind, accepted)
+                    rejected += failed
+                    stats["inserted"] += len(accepted) - len(failed)
+                if rejected:
+                    if rejects is None:
+                        rejects = open(rejects_path, "w", encoding="utf-8")
+                        stats["rejects_file"] = rejects_path
+                    for line, row, reason in sorted(rejected, key=lambda item: item[0]):
+                        rejects.write(json.dumps({"line": line, "row": row, "error": reason}, default=str) + "\n")
+                stats["rows"] += len(chunk)
+                stats["rejected"] += len(rejected)
+                stats["chunks"] += 1
+    finally:
+        if rejects is not None:
+            rejects.close()
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import patients, vitals or diagnoses")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("path", help="CSV or NDJSON file, '-' for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension (.csv or NDJSON)")
+    parser.add_argument("--rejects", help="rejected rows file; default: <path>.rejects.ndjson")
+    parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--db", help="SQLite file to import into (migrated to head first); default: the kiosk database")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.db:
+        db_engine = create_db_engine(f"sqlite:///{args.db}")
+        init_db(db_engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    fmt = args.format or detect_format(args.path)
+    rejects_path = args.rejects or ("rejects.ndjson" if args.path == "-" else f"{args.path}.rejects.ndjson")
+    if args.path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        stream = open(args.path, encoding="utf-8", newline="")
+    with stream:
+        stats = import_stream(args.kind, stream, fmt, rejects_path, args.chunk_size, session_factory)
+
+    print(f"[SUCCESS] Imported {stats['inserted']} of {stats['rows']} {args.kind} rows "
+          f"in {stats['chunks']} chunk(s), {stats['seconds']:.2f} s")
+    if stats["rejected"]:
+        print(f"[WARNING] {stats['rejected']} row(s) rejected, see {stats['rejects_file']}")
+    sys.exit(1 if stats["rejected"] else 0)
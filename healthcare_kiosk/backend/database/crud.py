@@ -1,30 +1,84 @@
+from sqlalchemy import DateTime, and_, func, insert, literal_column, or_, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from . import models
 from .models import User
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+
+# -------------------- Write path --------------------
+# Inserts are single INSERT ... RETURNING statements. The foreign key and
+# unique constraints do the existence checks, and RETURNING hands back the
+# generated id and timestamp, so there is no pre-check SELECT and no
+# refresh. Results are rows with the table's columns as attributes.
+
+class PatientNotFound(LookupError):
+    """The referenced patient does not exist"""
+
+class PatientAlreadyExists(ValueError):
+    """A patient with this Aadhaar is already registered"""
+
+class InvalidCursor(ValueError):
+    """A malformed ``*_before`` pagination cursor"""
+
+def _violates(error: IntegrityError, constraint: str) -> bool:
+    # SQLite reports "UNIQUE constraint failed: ..." / "FOREIGN KEY constraint failed"
+    return f"{constraint} constraint failed" in str(error.orig)
+
+# Statements shared with async_crud and bulk_import
+def patient_insert(aadhaar: str, name: str, age: int, gender: str):
+    return (insert(models.Patient)
+            .values(aadhaar=aadhaar, name=name, age=age, gender=gender)
+            .returning(*models.Patient.__table__.c))
+
+def vitals_values(patient_id: int, height: float, weight: float, bp: str, pulse: int) -> Dict[str, Any]:
+    """Column values of a vitals row, BMI included"""
+    # Calculate BMI
+    bmi = weight / (height/100)**2
+    return {
+        "patient_id": patient_id,
+        "height_cm": height,
+        "weight_kg": weight,
+        "blood_pressure": bp,
+        "pulse": pulse,
+        "bmi": round(bmi, 2)
+    }
+
+def vitals_insert(patient_id: int, height: float, weight: float, bp: str, pulse: int):
+    # SQLAlchemy renders RETURNING columns unqualified, which would break a
+    # correlated select(); SQLite accepts this subquery as written
+    patient_name = literal_column(
+        "(SELECT patients.name FROM patients WHERE patients.id = vitals.patient_id)"
+    ).label("patient_name")
+    return (insert(models.Vitals)
+            .values(**vitals_values(patient_id, height, weight, bp, pulse))
+            .returning(*models.Vitals.__table__.c, patient_name))
+
+def diagnosis_insert(patient_id: int, symptoms: str, result: str, model_version: Optional[str] = None):
+    return (insert(models.Diagnosis)
+            .values(
+                patient_id=patient_id,
+                symptoms=symptoms,
+                result=result,
+                model_version=model_version
+            )
+            .returning(*models.Diagnosis.__table__.c))
 
 # -------------------- Patient --------------------
 
 def create_patient(db: Session, aadhaar: str, name: str, age: int, gender: str):
+    """Raises PatientAlreadyExists if the Aadhaar is already registered"""
     try:
-        # Check if patient already exists
-        existing = db.query(models.Patient).filter_by(aadhaar=aadhaar).first()
-        if existing:
-            print(f"[ERROR] Patient with Aadhaar {aadhaar} already exists")
-            return None
-        
-        # Create new patient
-        patient = models.Patient(aadhaar=aadhaar, name=name, age=age, gender=gender)
-        db.add(patient)
+        patient = db.execute(patient_insert(aadhaar, name, age, gender)).one()
         db.commit()
-        db.refresh(patient)
         print(f"[SUCCESS] Created patient: {patient.name} (ID: {patient.id})")
         return patient
     
     except IntegrityError as e:
         db.rollback()
+        if _violates(e, "UNIQUE"):
+            print(f"[ERROR] Patient with Aadhaar {aadhaar} already exists")
+            raise PatientAlreadyExists(aadhaar)
         print(f"[ERROR] Database integrity error: {e}")
         return None
     except Exception as e:
@@ -54,31 +108,20 @@ def get_patient_by_name(db: Session, name: str):
 # -------------------- Vitals --------------------
 
 def add_vitals(db: Session, patient_id: int, height: float, weight: float, bp: str, pulse: int):
+    """Raises PatientNotFound; the returned row also carries ``patient_name``"""
     try:
-        # Verify patient exists
-        patient = db.query(models.Patient).filter_by(id=patient_id).first()
-        if not patient:
-            print(f"[ERROR] Patient with ID {patient_id} not found")
-            return None
-        
-        # Calculate BMI
-        bmi = weight / (height/100)**2
-        
-        vitals = models.Vitals(
-            patient_id=patient_id,
-            height_cm=height,
-            weight_kg=weight,
-            blood_pressure=bp,
-            pulse=pulse,
-            bmi=round(bmi, 2)
-        )
-        
-        db.add(vitals)
+        vitals = db.execute(vitals_insert(patient_id, height, weight, bp, pulse)).one()
         db.commit()
-        db.refresh(vitals)
         print(f"[SUCCESS] Added vitals for patient ID {patient_id}")
         return vitals
     
+    except IntegrityError as e:
+        db.rollback()
+        if _violates(e, "FOREIGN KEY"):
+            print(f"[ERROR] Patient with ID {patient_id} not found")
+            raise PatientNotFound(patient_id)
+        print(f"[ERROR] Failed to add vitals: {e}")
+        return None
     except Exception as e:
         db.rollback()
         print(f"[ERROR] Failed to add vitals: {e}")
@@ -86,71 +129,163 @@ def add_vitals(db: Session, patient_id: int, height: float, weight: float, bp: s
 
 # -------------------- Diagnosis --------------------
 
-def add_diagnosis(db: Session, patient_id: int, symptoms: str, result: str):
+def add_diagnosis(db: Session, patient_id: int, symptoms: str, result: str, model_version: Optional[str] = None):
+    """Raises PatientNotFound"""
     try:
-        # Verify patient exists
-        patient = db.query(models.Patient).filter_by(id=patient_id).first()
-        if not patient:
-            print(f"[ERROR] Patient with ID {patient_id} not found")
-            return None
-        
-        diagnosis = models.Diagnosis(
-            patient_id=patient_id,
-            symptoms=symptoms,
-            result=result
-        )
-        
-        db.add(diagnosis)
+        diagnosis = db.execute(diagnosis_insert(patient_id, symptoms, result, model_version)).one()
         db.commit()
-        db.refresh(diagnosis)
         print(f"[SUCCESS] Added diagnosis for patient ID {patient_id}")
         return diagnosis
     
+    except IntegrityError as e:
+        db.rollback()
+        if _violates(e, "FOREIGN KEY"):
+            print(f"[ERROR] Patient with ID {patient_id} not found")
+            raise PatientNotFound(patient_id)
+        print(f"[ERROR] Failed to add diagnosis: {e}")
+        return None
     except Exception as e:
         db.rollback()
         print(f"[ERROR] Failed to add diagnosis: {e}")
         return None
 
+def get_frequent_symptom_sets(db: Session, limit: int = 100):
+    """Most frequently diagnosed ``symptoms`` strings, most common first"""
+    try:
+        rows = (
+            db.query(models.Diagnosis.symptoms)
+            .group_by(models.Diagnosis.symptoms)
+            .order_by(func.count(models.Diagnosis.id).desc())
+            .limit(limit)
+            .all()
+        )
+        return [row.symptoms for row in rows]
+    except Exception as e:
+        print(f"[ERROR] Failed to retrieve frequent symptom sets: {e}")
+        return []
+
 # -------------------- Full EHR --------------------
 
-def get_patient_ehr(db: Session, patient_id: int) -> Optional[Dict[str, Any]]:
+# Keyset cursor "<timestamp>_<id>" of the last record on a page; the next
+# page holds the records before it in (timestamp desc, id desc) order
+def encode_cursor(record) -> Optional[str]:
+    if record is None or record.timestamp is None:
+        return None
+    return f"{record.timestamp.isoformat()}_{record.id}"
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises InvalidCursor for a malformed cursor"""
+    try:
+        timestamp, record_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except ValueError as e:
+        raise InvalidCursor(f"{cursor!r}: {e}") from e
+
+def ehr_section_query(model, patient_id: int, limit: Optional[int], before: Optional[str],
+                      since: Optional[datetime], until: Optional[datetime]):
+    """One page of ``model`` rows, newest first, plus one to tell if more follow"""
+    criteria = [model.patient_id == patient_id]
+    if since:
+        criteria.append(model.timestamp >= since)
+    if until:
+        criteria.append(model.timestamp < until)
+    if before:
+        timestamp, record_id = decode_cursor(before)
+        criteria.append(or_(model.timestamp < timestamp,
+                            and_(model.timestamp == timestamp, model.id < record_id)))
+    # Walks the (patient_id, timestamp) index backwards, no sort
+    query = select(model).where(*criteria).order_by(model.timestamp.desc(), model.id.desc())
+    return query if limit is None else query.limit(limit + 1)
+
+def _page(records, limit: Optional[int]):
+    if limit is not None and len(records) > limit:
+        return records[:limit], encode_cursor(records[limit - 1])
+    return records, None
+
+def ehr_summary_query(patient_id: int):
+    """The patient with record counts and last visit, in one statement"""
+    def per_patient(expression, model):
+        return select(expression).where(model.patient_id == models.Patient.id).scalar_subquery()
+
+    last_vitals = per_patient(func.max(models.Vitals.timestamp), models.Vitals)
+    last_diagnosis = per_patient(func.max(models.Diagnosis.timestamp), models.Diagnosis)
+    return select(
+        models.Patient,
+        per_patient(func.count(models.Vitals.id), models.Vitals),
+        per_patient(func.count(models.Diagnosis.id), models.Diagnosis),
+        # SQLite's two-argument max() is NULL if either side is
+        func.max(func.coalesce(last_vitals, last_diagnosis), func.coalesce(last_diagnosis, last_vitals),
+                 type_=DateTime),
+    ).where(models.Patient.id == patient_id)
+
+def ehr_data(summary_row, vitals_rows, diagnoses_rows, limit: Optional[int]) -> Dict[str, Any]:
+    patient, total_vitals, total_diagnoses, last_visit = summary_row
+    vitals, vitals_next = _page(vitals_rows, limit)
+    diagnoses, diagnoses_next = _page(diagnoses_rows, limit)
+    return {
+        "patient": {
+            "id": patient.id,
+            "aadhaar": patient.aadhaar,
+            "name": patient.name,
+            "age": patient.age,
+            "gender": patient.gender
+        },
+        "vitals": [
+            {
+                "id": v.id,
+                "height": v.height_cm,
+                "weight": v.weight_kg,
+                "bp": v.blood_pressure,
+                "pulse": v.pulse,
+                "bmi": v.bmi,
+                "timestamp": v.timestamp.isoformat() if v.timestamp else None
+            } for v in vitals
+        ],
+        "diagnoses": [
+            {
+                "id": d.id,
+                "symptoms": d.symptoms,
+                "result": d.result,
+                "model_version": d.model_version,
+                "timestamp": d.timestamp.isoformat() if d.timestamp else None
+            } for d in diagnoses
+        ],
+        "summary": {
+            "total_vitals_records": total_vitals,
+            "total_diagnoses": total_diagnoses,
+            "last_visit": last_visit.isoformat() if last_visit else None
+        },
+        "pagination": {
+            "vitals": {"next_before": vitals_next},
+            "diagnoses": {"next_before": diagnoses_next}
+        }
+    }
+
+def get_patient_ehr(db: Session, patient_id: int, limit: Optional[int] = None,
+                    vitals_before: Optional[str] = None, diagnoses_before: Optional[str] = None,
+                    vitals_since: Optional[datetime] = None, vitals_until: Optional[datetime] = None,
+                    diagnoses_since: Optional[datetime] = None,
+                    diagnoses_until: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """EHR with up to ``limit`` vitals and diagnoses each, newest first.
+
+    ``*_before`` take the ``next_before`` cursor of the previous page and
+    ``*_since`` / ``*_until`` bound a section's timestamps. The summary covers
+    all of the patient's records and is computed in SQL.
+    """
+    # A malformed cursor raises InvalidCursor for the caller to report
+    vitals_query = ehr_section_query(models.Vitals, patient_id, limit, vitals_before, vitals_since, vitals_until)
+    diagnoses_query = ehr_section_query(models.Diagnosis, patient_id, limit, diagnoses_before,
+                                        diagnoses_since, diagnoses_until)
     try:
-        patient = db.query(models.Patient).filter_by(id=patient_id).first()
-        if not patient:
+        # Patient and summary in one statement, then one bounded query per section
+        row = db.execute(ehr_summary_query(patient_id)).first()
+        if not row:
             print(f"[ERROR] Patient with ID {patient_id} not found")
             return None
+        ehr = ehr_data(row, db.scalars(vitals_query).all(), db.scalars(diagnoses_query).all(), limit)
         
-        ehr_data = {
-            "patient": {
-                "id": patient.id,
-                "aadhaar": patient.aadhaar,
-                "name": patient.name,
-                "age": patient.age,
-                "gender": patient.gender
-            },
-            "vitals": [
-                {
-                    "id": v.id,
-                    "height": v.height_cm,
-                    "weight": v.weight_kg,
-                    "bp": v.blood_pressure,
-                    "pulse": v.pulse,
-                    "bmi": v.bmi,
-                    "timestamp": v.timestamp.isoformat() if v.timestamp else None
-                } for v in patient.vitals
-            ],
-            "diagnoses": [
-                {
-                    "id": d.id,
-                    "symptoms": d.symptoms,
-                    "result": d.result,
-                    "timestamp": d.timestamp.isoformat() if d.timestamp else None
-                } for d in patient.diagnoses
-            ]
-        }
-        
-        print(f"[SUCCESS] Retrieved EHR for patient: {patient.name}")
-        return ehr_data
+        print(f"[SUCCESS] Retrieved EHR for patient: {row[0].name}")
+        return ehr
     
     except Exception as e:
         print(f"[ERROR] Failed to retrieve EHR: {e}")
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 from pathlib import Path
+import sys
+from ..settings import DB_PROFILE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_S, DB_ASYNC_POOL_SIZE
 
 # Get the correct path relative to the project root
 PROJECT_ROOT = Path(__file__).parent.parent.parent  # Go up to healthcare_kiosk/
@@ -13,25 +17,121 @@ DATABASE_DIR.mkdir(parents=True, exist_ok=True)
 
 # SQLite database file path
 DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+# Same file through aiosqlite, for the async endpoints
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 
-print(f"[INFO] Database URL: {DATABASE_URL}")
-print(f"[INFO] Database Path: {DATABASE_PATH}")
+# Import-time messages go to stderr: CLIs such as bulk_export write their data to stdout
+print(f"[INFO] Database URL: {DATABASE_URL}", file=sys.stderr)
+print(f"[INFO] Database Path: {DATABASE_PATH}", file=sys.stderr)
+
+# ------------------ STORAGE PROFILES ------------------
+# PRAGMAs run on every new connection; journal_mode=WAL persists in the file
+STORAGE_PROFILES = {
+    # SQLite defaults: rollback journal, writers block readers. Foreign keys
+    # are on in every profile: the write path relies on them (crud.add_vitals)
+    "default": {"journal_mode": "DELETE", "foreign_keys": "ON"},
+    # WAL lets readers run alongside the single writer; NORMAL only syncs at
+    # checkpoints, which can lose the last commits on power loss but never corrupts
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative: KiB, i.e. 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+    # WAL concurrency with a sync on every commit
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+}
+
+def _apply_pragmas(pragmas: dict):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+def create_db_engine(database_url: str = DATABASE_URL, profile: str = DB_PROFILE,
+                     pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW,
+                     pool_timeout: float = DB_POOL_TIMEOUT_S):
+    """SQLite engine with ``profile``'s PRAGMAs applied to every pooled connection"""
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile '{profile}', expected one of {sorted(STORAGE_PROFILES)}")
+    db_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        echo=False  # Set to True for SQL debugging
+    )
+    event.listen(db_engine, "connect", _apply_pragmas(STORAGE_PROFILES[profile]))
+    return db_engine
+
+def create_async_db_engine(database_url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE,
+                           pool_size: int = DB_ASYNC_POOL_SIZE, max_overflow: int = 0,
+                           pool_timeout: float = DB_POOL_TIMEOUT_S):
+    """aiosqlite engine with ``profile``'s PRAGMAs; sessions beyond the pool wait for a connection"""
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown storage profile '{profile}', expected one of {sorted(STORAGE_PROFILES)}")
+    # aiosqlite defaults to NullPool, which would open a connection (and its
+    # thread) per session; pool them like the sync engine does
+    async_engine = create_async_engine(
+        database_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        echo=False
+    )
+    # aiosqlite's connection adapter exposes the DBAPI cursor() the listener uses
+    event.listen(async_engine.sync_engine, "connect", _apply_pragmas(STORAGE_PROFILES[profile]))
+    return async_engine
 
 # SQLAlchemy engine and session
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    echo=False  # Set to True for SQL debugging
-)
+engine = create_db_engine()
+print(f"[INFO] Storage profile: {DB_PROFILE} (pool {DB_POOL_SIZE} + {DB_MAX_OVERFLOW} overflow)", file=sys.stderr)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session; engines connect lazily, so this costs nothing until used.
+# Objects stay readable after commit since async sessions cannot lazy-load them
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base model (shared across models.py)
 Base = declarative_base()
 
-# Create all tables (called from main.py during startup)
-def init_db():
-    from . import models
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+# ------------------ MIGRATIONS ------------------
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+# Schema that create_all produced before migrations existed
+BASELINE_REVISION = "0001"
+
+def _alembic_config(connection):
+    from alembic.config import Config
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.attributes["connection"] = connection
+    return config
+
+# Create or upgrade the tables (called from main.py during startup)
+def init_db(db_engine=None):
+    from alembic import command
+    db_engine = db_engine or engine
+    print("Migrating database schema...")
+    with db_engine.begin() as connection:
+        tables = set(inspect(connection).get_table_names())
+        config = _alembic_config(connection)
+        if "patients" in tables and "alembic_version" not in tables:
+            # Created by create_all before migrations; adopt it at the baseline
+            command.stamp(config, BASELINE_REVISION)
+            print(f"[INFO] Existing database stamped at revision {BASELINE_REVISION}")
+        command.upgrade(config, "head")
+    print("Database schema is up to date!")
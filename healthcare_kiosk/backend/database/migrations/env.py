@@ -0,0 +1,47 @@
+# backend/database/migrations/env.py
+from logging.config import fileConfig
+from alembic import context
+from backend.database import models  # registers the tables on Base.metadata
+from backend.database.database import Base, engine
+
+config = context.config
+
+# Only the alembic CLI has an ini file; the backend keeps its own logging setup
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # init_db passes its own connection; the CLI uses the backend's engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+    else:
+        with engine.connect() as connection:
+            _run(connection)
+
+
+def _run(connection) -> None:
+    # Batch mode recreates tables for the ALTERs SQLite lacks
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
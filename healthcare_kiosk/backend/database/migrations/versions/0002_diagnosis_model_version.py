@@ -0,0 +1,26 @@
+"""Record the model version on each diagnosis
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases from before migrations may already have it (added by an ALTER at startup)
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("diagnosis")}
+    if "model_version" not in columns:
+        with op.batch_alter_table("diagnosis") as batch_op:
+            batch_op.add_column(sa.Column("model_version", sa.String(length=50)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("diagnosis") as batch_op:
+        batch_op.drop_column("model_version")
@@ -0,0 +1,30 @@
+"""Index vitals/diagnosis by (patient_id, timestamp), diagnosis.timestamp and patients.name
+
+The EHR relationship loads filter on patient_id, /test-db sorts every
+diagnosis by timestamp and login-by-name looks patients up by name; without
+these indexes each of them scans its whole table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_vitals_patient_id_timestamp", "vitals", ["patient_id", "timestamp"])
+    op.create_index("ix_diagnosis_patient_id_timestamp", "diagnosis", ["patient_id", "timestamp"])
+    op.create_index("ix_diagnosis_timestamp", "diagnosis", ["timestamp"])
+    op.create_index("ix_patients_name", "patients", ["name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_patients_name", table_name="patients")
+    op.drop_index("ix_diagnosis_timestamp", table_name="diagnosis")
+    op.drop_index("ix_diagnosis_patient_id_timestamp", table_name="diagnosis")
+    op.drop_index("ix_vitals_patient_id_timestamp", table_name="vitals")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .database import Base  
@@ -8,7 +8,7 @@ class Patient(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     aadhaar = Column(String(12), unique=True, index=True, nullable=False)
-    name = Column(String(100), nullable=False)
+    name = Column(String(100), nullable=False, index=True)
     age = Column(Integer, nullable=False)
     gender = Column(String(10), nullable=False)
     
@@ -31,6 +31,8 @@ class Vitals(Base):
     # Relationship
     patient = relationship("Patient", back_populates="vitals")
 
+    __table_args__ = (Index("ix_vitals_patient_id_timestamp", "patient_id", "timestamp"),)
+
 class Diagnosis(Base):
     __tablename__ = "diagnosis"
     
@@ -38,11 +40,14 @@ class Diagnosis(Base):
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     symptoms = Column(String, nullable=False)  # store as comma-separated
     result = Column(String, nullable=False)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    model_version = Column(String(50))  # model that produced the result
+    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
     
     # Relationship
     patient = relationship("Patient", back_populates="diagnoses")
 
+    __table_args__ = (Index("ix_diagnosis_patient_id_timestamp", "patient_id", "timestamp"),)
+
 class User(Base):
     __tablename__ = "users"
     
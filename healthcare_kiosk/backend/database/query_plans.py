@@ -0,0 +1,99 @@
+# backend/database/query_plans.py
+"""Checks that the hot queries are served by their indexes.
+
+    python -m backend.database.query_plans            # scratch database at the head revision
+    python -m backend.database.query_plans --db backend/database/healthcare.db
+
+Runs EXPLAIN QUERY PLAN on the SQL the ORM emits for each query and exits
+non-zero if a plan does not use the expected index.
+"""
+import argparse
+from datetime import datetime
+import os
+import sys
+import tempfile
+from sqlalchemy import select, text
+from . import bulk_export, bulk_import, crud, models
+from .database import create_db_engine, init_db
+
+# name -> (statement, index its plan must use)
+CHECKS = {
+    "EHR vitals (Patient.vitals)": (
+        select(models.Vitals).where(models.Vitals.patient_id == 1),
+        "ix_vitals_patient_id_timestamp",
+    ),
+    "EHR diagnoses (Patient.diagnoses)": (
+        select(models.Diagnosis).where(models.Diagnosis.patient_id == 1),
+        "ix_diagnosis_patient_id_timestamp",
+    ),
+    "patient diagnoses by time": (
+        select(models.Diagnosis).where(models.Diagnosis.patient_id == 1)
+        .order_by(models.Diagnosis.timestamp.desc()),
+        "ix_diagnosis_patient_id_timestamp",
+    ),
+    "/ehr vitals page (keyset)": (
+        crud.ehr_section_query(models.Vitals, 1, 50, f"{datetime(2025, 1, 1).isoformat()}_10", None, None),
+        "ix_vitals_patient_id_timestamp",
+    ),
+    "/ehr diagnoses page (time range)": (
+        crud.ehr_section_query(models.Diagnosis, 1, 50, None, datetime(2025, 1, 1), datetime(2025, 2, 1)),
+        "ix_diagnosis_patient_id_timestamp",
+    ),
+    "get_patient_by_name": (
+        select(models.Patient).where(models.Patient.name == "Pratham").limit(1),
+        "ix_patients_name",
+    ),
+    "bulk import patient lookup": (
+        bulk_import.patient_lookup_query(["123456789012", "210987654321"], [1, 2]),
+        "ix_patients_aadhaar",
+    ),
+    "bulk export diagnoses (date range)": (
+        bulk_export.export_query("diagnoses", datetime(2025, 1, 1), datetime(2025, 2, 1)),
+        "ix_diagnosis_timestamp",
+    ),
+    "bulk export patients (date range)": (
+        bulk_export.export_query("patients", datetime(2025, 1, 1), datetime(2025, 2, 1)),
+        "ix_vitals_patient_id_timestamp",
+    ),
+    "/test-db recent diagnoses": (
+        select(models.Diagnosis).order_by(models.Diagnosis.timestamp.desc()).limit(5),
+        "ix_diagnosis_timestamp",
+    ),
+}
+
+
+def query_plan(connection, statement) -> list:
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+def check_plans(db_engine) -> list:
+    """(name, expected index, plan lines, passed) for every check"""
+    results = []
+    with db_engine.connect() as connection:
+        for name, (statement, index) in CHECKS.items():
+            plan = query_plan(connection, statement)
+            # "USING INDEX ix" or "USING COVERING INDEX ix"
+            passed = any(f"INDEX {index}" in line for line in plan)
+            results.append((name, index, plan, passed))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the query plans of the hot queries")
+    parser.add_argument("--db", help="SQLite file to check (migrated to head first); default: a scratch database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db or os.path.join(tmp_dir, "plans.db")
+        db_engine = create_db_engine(f"sqlite:///{db_path}")
+        init_db(db_engine)
+        results = check_plans(db_engine)
+        db_engine.dispose()
+
+    for name, index, plan, passed in results:
+        print(f"{'✅' if passed else '❌'} {name}: expected {index}")
+        for line in plan:
+            print(f"     {line}")
+    failed = [name for name, _, _, passed in results if not passed]
+    print("All queries use their indexes" if not failed else f"{len(failed)} query plan(s) without their index")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,167 @@
+# backend/database/write_behind.py
+"""Group commit for the /vitals and /diagnose inserts.
+
+With KIOSK_WRITE_BEHIND_MAX_BATCH_SIZE > 0 the endpoints hand their INSERT
+... RETURNING statements to a WriteBehindQueue instead of committing them
+one by one. A single writer task on the event loop takes the first queued
+insert, keeps collecting until ``max_batch_size`` inserts or ``max_wait_ms``
+have passed, runs them in one transaction and commits once. Each caller
+awaits a future that resolves to its row only after that commit. The
+writer's connection runs with synchronous=FULL whatever the storage
+profile, so the commit is fsynced before anyone is acknowledged: one fsync
+per batch instead of one per insert is what the group commit buys.
+"""
+import asyncio
+from collections import Counter, deque
+import time
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+# Queued by close() to stop the writer after the inserts ahead of it
+_STOP = object()
+# Recent batches / inserts kept for the latency percentiles
+TIMING_WINDOW = 1000
+
+
+def _synchronous_full(dbapi_connection, connection_record):
+    # Runs after the profile's PRAGMAs, so it overrides synchronous=NORMAL
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA synchronous=FULL")
+    cursor.close()
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+    }
+
+
+class WriteBehindQueue:
+    """Awaitable inserts, committed in batches by one writer task.
+
+    ``execute`` queues a statement and returns its RETURNING row once the
+    batch holding it has committed. A constraint failure only fails its own
+    insert: SQLite rolls back just the failing statement, and the rest of
+    the batch commits. At most ``max_pending`` inserts wait in the queue;
+    beyond that ``execute`` waits for room, which pushes back on callers.
+    Must be started and used on one event loop.
+
+    The queue owns ``engine``, a fresh async engine of its own: it sets
+    synchronous=FULL on the engine's connections and disposes it on close.
+    """
+
+    def __init__(self, engine, max_batch_size: int = 256, max_wait_ms: float = 5.0, max_pending: int = 1024):
+        self.engine = engine
+        event.listen(engine.sync_engine, "connect", _synchronous_full)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.max_pending = max(0, max_pending)
+        self._queue = None
+        self._writer = None
+        self._counts = {"submitted": 0, "committed": 0, "failed": 0}
+        self._batch_sizes = Counter()
+        self._flush_ms = deque(maxlen=TIMING_WINDOW)
+        self._ack_ms = deque(maxlen=TIMING_WINDOW)
+
+    def start(self):
+        """Start the writer task on the running event loop"""
+        if self._writer is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._writer = asyncio.get_running_loop().create_task(self._loop(), name="write-behind")
+
+    async def close(self):
+        """Commit the inserts already queued, stop the writer and release its connection"""
+        if self._writer is not None:
+            await self._queue.put(_STOP)
+            await self._writer
+            self._writer = None
+        await self.engine.dispose()
+
+    async def execute(self, statement):
+        """Run an INSERT ... RETURNING in the next group commit and return its row"""
+        if self._writer is None or self._writer.done():
+            raise RuntimeError("Write-behind queue is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((statement, future, time.perf_counter()))
+        self._counts["submitted"] += 1
+        return await future
+
+    async def _collect(self):
+        """Next batch, and whether close() was reached while collecting it"""
+        item = await self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            try:
+                item = (await asyncio.wait_for(self._queue.get(), timeout) if timeout > 0
+                        else self._queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch):
+        start = time.perf_counter()
+        results = []
+        try:
+            async with self.engine.connect() as connection:
+                for statement, _, _ in batch:
+                    try:
+                        results.append((await connection.execute(statement)).one())
+                    except IntegrityError as e:
+                        results.append(e)
+                await connection.commit()
+        except Exception as e:
+            print(f"[ERROR] Write-behind commit of {len(batch)} inserts failed: {e}")
+            results = [e] * len(batch)
+        else:
+            self._flush_ms.append((time.perf_counter() - start) * 1000)
+            self._batch_sizes[len(batch)] += 1
+
+        acked_at = time.perf_counter()
+        for (_, future, queued_at), result in zip(batch, results):
+            failed = isinstance(result, Exception)
+            self._counts["failed" if failed else "committed"] += 1
+            self._ack_ms.append((acked_at - queued_at) * 1000)
+            # A caller that went away still had its insert committed
+            if future.done():
+                continue
+            if failed:
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _loop(self):
+        stopped = False
+        while not stopped:
+            batch, stopped = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    def stats(self) -> dict:
+        sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        rows = sum(size * count for size, count in sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "max_pending": self.max_pending,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            **self._counts,
+            "batches": batches,
+            "mean_batch_size": round(rows / batches, 2) if batches else 0.0,
+            "batch_size_distribution": sizes,
+            # Transaction time per batch, and enqueue -> acknowledgement per insert
+            "flush_ms": _percentiles(list(self._flush_ms)),
+            "ack_ms": _percentiles(list(self._ack_ms)),
+        }
@@ -0,0 +1,231 @@
+# backend/diagnosis_pool.py
+"""Runs the CPU-bound half of /diagnose: symptom extraction plus prediction.
+
+Regex normalization, phrase matching, rapidfuzz and inference all hold the
+GIL. Run on FastAPI's threadpool, a few heavy complaints slow down every
+other endpoint. With KIOSK_DIAGNOSE_WORKERS > 0 that work goes to spawned
+worker processes instead. Each worker loads the vocabulary and the model
+when it starts.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+import time
+from typing import NamedTuple
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+STAGES = ("queue", "extract", "predict", "total")
+# How long start() waits for every worker to load its model
+WORKER_START_TIMEOUT_S = 300
+# Recent requests kept per stage for the timing percentiles
+TIMING_WINDOW = 1000
+
+
+class DiagnosisResult(NamedTuple):
+    names: list
+    diagnosis: str          # None when no symptoms were found
+    model_version: str
+    timings: dict           # stage -> ms, measured where the stage ran
+
+
+class DiagnosisPoolBusy(RuntimeError):
+    """Raised when max_pending requests are already waiting"""
+
+
+def _extract(text: str, submitted_at: float):
+    from . import symptoms_extractor
+
+    timings = {"queue": max(0.0, (time.time() - submitted_at) * 1000)}
+    start = time.perf_counter()
+    extracted = symptoms_extractor.extract_symptoms_with_ids(text)
+    timings["extract"] = (time.perf_counter() - start) * 1000
+    return extracted, timings
+
+def _extract_and_predict(text: str, model, submitted_at: float) -> DiagnosisResult:
+    from . import ai_symptom_checker
+
+    extracted, timings = _extract(text, submitted_at)
+    diagnosis = None
+    if extracted.names:
+        start = time.perf_counter()
+        diagnosis = ai_symptom_checker.predict_condition_from_ids(extracted.ids, extracted.matcher, model)
+        timings["predict"] = (time.perf_counter() - start) * 1000
+    return DiagnosisResult(extracted.names, diagnosis, model.version, timings)
+
+async def _extract_and_predict_async(text: str, model, submitted_at: float) -> DiagnosisResult:
+    """In-process path: extraction on the threadpool, prediction awaited on the batcher / infer requests"""
+    from . import ai_symptom_checker
+
+    extracted, timings = await run_in_threadpool(_extract, text, submitted_at)
+    diagnosis = None
+    if extracted.names:
+        start = time.perf_counter()
+        diagnosis = await ai_symptom_checker.predict_condition_from_ids_async(extracted.ids, extracted.matcher, model)
+        timings["predict"] = (time.perf_counter() - start) * 1000
+    return DiagnosisResult(extracted.names, diagnosis, model.version, timings)
+
+# ------------------ WORKER PROCESSES ------------------
+def _worker_env() -> dict:
+    """Settings overrides for workers: one request at a time, one core each unless configured"""
+    return {
+        "KIOSK_INFERENCE_BATCH_MAX_SIZE": "0",
+        "KIOSK_FUZZY_WORKERS": os.environ.get("KIOSK_FUZZY_WORKERS", "1"),
+        "KIOSK_OPENVINO_NUM_THREADS": os.environ.get("KIOSK_OPENVINO_NUM_THREADS", "1"),
+        "KIOSK_MODEL_WATCH_INTERVAL_S": "0",
+    }
+
+# Set in each worker by _init_worker
+_ready_barrier = None
+
+def _init_worker(env: dict, ready_barrier):
+    global _ready_barrier
+    _ready_barrier = ready_barrier
+    os.environ.update(env)
+    # Importing loads the active model; settings are read at import, after the overrides
+    from . import ai_symptom_checker, symptoms_extractor
+    symptoms_extractor.get_symptom_matcher()
+    ai_symptom_checker.active_model().warm()
+
+def _worker_ready() -> int:
+    # Held until every worker has taken one, so no initialized worker can
+    # take a second and leave another still loading its model
+    _ready_barrier.wait(WORKER_START_TIMEOUT_S)
+    return os.getpid()
+
+def _worker_extract_and_predict(text: str, version: str, submitted_at: float) -> DiagnosisResult:
+    from . import ai_symptom_checker
+
+    # Follow the parent's model version; reload_model is a no-op when it matches
+    model = ai_symptom_checker.reload_model(version)
+    return _extract_and_predict(text, model, submitted_at)
+
+# ------------------ POOL ------------------
+class DiagnosisPool:
+    """Awaitable extraction + prediction, in worker processes or in-process.
+
+    ``workers=0`` keeps the work in-process: extraction on FastAPI's
+    threadpool, then the prediction is awaited without holding a thread. At most
+    ``max_pending`` requests (0 for no limit) may wait or run at once;
+    beyond that ``run`` raises DiagnosisPoolBusy.
+    """
+
+    def __init__(self, workers: int = 0, max_pending: int = 0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        # Held while a replacement pool warms up
+        self._restart_lock = threading.Lock()
+        self._pending = 0
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "restarts": 0}
+        self._timings = {stage: deque(maxlen=TIMING_WINDOW) for stage in STAGES}
+
+    def start(self):
+        """Start the workers and wait until each has loaded its model"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = self._spawn()
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        start = time.perf_counter()
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(_worker_env(), context.Barrier(self.workers)),
+        )
+        pids = {future.result() for future in [executor.submit(_worker_ready) for _ in range(self.workers)]}
+        print(f"[INFO] Diagnosis pool: {len(pids)} worker process(es) ready in "
+              f"{time.perf_counter() - start:.1f} s")
+        return executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace ``broken``, unless a request that saw it break first is doing so or has"""
+        # Callers that lose the race fail their request instead of holding a thread for the restart
+        if not self._restart_lock.acquire(blocking=False):
+            return
+        try:
+            if self._executor is not broken:
+                return
+            with self._lock:
+                self._counts["restarts"] += 1
+            print("[WARNING] Diagnosis pool: a worker process died, restarting the pool")
+            # Requests keep failing on the broken pool until the new one is warm
+            self._executor = self._spawn()
+        finally:
+            self._restart_lock.release()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, text: str, model) -> DiagnosisResult:
+        """Extract symptoms from ``text`` and predict with ``model`` (or its version, in a worker)"""
+        with self._lock:
+            if self.max_pending and self._pending >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise DiagnosisPoolBusy(f"{self._pending} diagnoses already pending")
+            self._pending += 1
+            self._counts["submitted"] += 1
+        start = time.perf_counter()
+        try:
+            executor = self._executor
+            if executor is not None:
+                try:
+                    try:
+                        future = executor.submit(_worker_extract_and_predict, text, model.version, time.time())
+                    except RuntimeError:  # BrokenProcessPool, or shut down by a restart
+                        if self._executor is executor or self._executor is None:
+                            raise
+                        # Replaced after it was read; nothing ran, so use the new pool
+                        executor = self._executor
+                        future = executor.submit(_worker_extract_and_predict, text, model.version, time.time())
+                    result = await asyncio.wrap_future(future)
+                except BrokenProcessPool:
+                    await run_in_threadpool(self._restart, executor)
+                    raise
+            else:
+                result = await _extract_and_predict_async(text, model, time.time())
+        except Exception:
+            with self._lock:
+                self._counts["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        timings = dict(result.timings, total=(time.perf_counter() - start) * 1000)
+        with self._lock:
+            self._counts["completed"] += 1
+            for stage, ms in timings.items():
+                self._timings[stage].append(ms)
+        return result._replace(timings=timings)
+
+    def stats(self) -> dict:
+        with self._lock:
+            timings = {stage: list(values) for stage, values in self._timings.items()}
+            stats = {
+                "mode": "processes" if self._executor is not None else "threadpool",
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **self._counts,
+            }
+        stats["stage_ms"] = {
+            stage: {
+                "count": len(values),
+                "mean": round(float(np.mean(values)), 3),
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p95": round(float(np.percentile(values, 95)), 3),
+            } if values else {"count": 0}
+            for stage, values in timings.items()
+        }
+        return stats
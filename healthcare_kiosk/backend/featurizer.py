@@ -0,0 +1,223 @@
+# backend/featurizer.py
+"""NumPy TF-IDF featurizer, exported from the fitted sklearn vectorizer.
+
+    python -m backend.featurizer export   # vectorizer.pkl -> featurizer.npz
+    python -m backend.featurizer check    # parity with sklearn on symptoms_disease.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from threading import local
+import numpy as np
+from .model_registry import active_model_dir
+
+# Defaults point at the active model version
+MODEL_DIR = active_model_dir()
+VECTORIZER_PATH = os.path.join(MODEL_DIR, "vectorizer.pkl")
+FEATURIZER_PATH = os.path.join(MODEL_DIR, "featurizer.npz")
+SYMPTOM_CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "symptoms_disease.csv")
+
+
+class TfidfFeaturizer:
+    """Same features as a fitted word-level ``TfidfVectorizer``, computed with NumPy.
+
+    Rows are written into caller-provided or reusable buffers, so the per-request
+    path allocates nothing beyond the token list.
+    """
+
+    def __init__(self, vocabulary: dict, idf: np.ndarray, lowercase: bool = True,
+                 token_pattern: str = r"(?u)\b\w\w+\b", norm: str = "l2",
+                 sublinear_tf: bool = False, binary: bool = False):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.n_features = len(self.idf)
+        self._token_re = re.compile(token_pattern)
+        self._buffers = local()
+
+    # ------------------ EXPORT / LOAD ------------------
+    @classmethod
+    def from_vectorizer(cls, vectorizer) -> "TfidfFeaturizer":
+        if vectorizer.analyzer != "word" or vectorizer.ngram_range != (1, 1):
+            raise ValueError("only word unigram vectorizers are supported")
+        if (vectorizer.preprocessor is not None or vectorizer.tokenizer is not None
+                or vectorizer.strip_accents is not None or vectorizer.stop_words is not None):
+            raise ValueError("custom preprocessing is not supported")
+        idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vectorizer.vocabulary_))
+        return cls(
+            vocabulary={term: int(col) for term, col in vectorizer.vocabulary_.items()},
+            idf=idf,
+            lowercase=vectorizer.lowercase,
+            token_pattern=vectorizer.token_pattern,
+            norm=vectorizer.norm,
+            sublinear_tf=vectorizer.sublinear_tf,
+            binary=vectorizer.binary,
+        )
+
+    def settings(self) -> dict:
+        return {
+            "lowercase": self.lowercase,
+            "token_pattern": self.token_pattern,
+            "norm": self.norm,
+            "sublinear_tf": self.sublinear_tf,
+            "binary": self.binary,
+        }
+
+    def terms(self) -> list:
+        """Vocabulary terms in column order"""
+        terms = [None] * self.n_features
+        for term, col in self.vocabulary.items():
+            terms[col] = term
+        return terms
+
+    def save(self, path: str = FEATURIZER_PATH, source_hash: str = ""):
+        np.savez(path, terms=np.array(self.terms()), idf=self.idf,
+                 settings=np.array(json.dumps(self.settings())),
+                 source_hash=np.array(source_hash))
+
+    @classmethod
+    def load(cls, path: str = FEATURIZER_PATH, source_hash: str = None) -> "TfidfFeaturizer":
+        """Load exported arrays, checking they came from the vectorizer with ``source_hash``"""
+        with np.load(path, allow_pickle=False) as data:
+            if source_hash is not None and str(data["source_hash"]) != source_hash:
+                raise ValueError(f"{path} was exported from a different vectorizer")
+            terms = data["terms"].tolist()
+            return cls({term: col for col, term in enumerate(terms)}, data["idf"],
+                       **json.loads(str(data["settings"])))
+
+    # ------------------ TRANSFORM ------------------
+    def _term_counts(self, text: str, row: np.ndarray):
+        if self.lowercase:
+            text = text.lower()
+        vocabulary = self.vocabulary
+        for token in self._token_re.findall(text):
+            col = vocabulary.get(token)
+            if col is not None:
+                row[col] += 1.0
+
+    def _weight(self, X: np.ndarray):
+        """Term counts -> tf-idf, normalized in place"""
+        if self.binary:
+            np.minimum(X, 1.0, out=X)
+        if self.sublinear_tf:
+            present = X > 0
+            np.log(X, out=X, where=present)
+            np.add(X, 1.0, out=X, where=present)
+        X *= self.idf
+        self._normalize(X)
+
+    def _normalize(self, X: np.ndarray):
+        if self.norm == "l2":
+            norms = np.sqrt(np.einsum("ij,ij->i", X, X))
+        elif self.norm == "l1":
+            norms = np.abs(X).sum(axis=1)
+        else:
+            return
+        norms[norms == 0] = 1.0
+        X /= norms[:, None]
+
+    def transform(self, texts, out: np.ndarray = None) -> np.ndarray:
+        """float32 feature rows for ``texts``, written into ``out`` when given"""
+        scratch = np.zeros((len(texts), self.n_features), dtype=np.float64)
+        for i, text in enumerate(texts):
+            self._term_counts(text, scratch[i])
+        self._weight(scratch)
+        if out is None:
+            return scratch.astype(np.float32)
+        out[:len(texts)] = scratch
+        return out[:len(texts)]
+
+    def transform_one(self, text: str) -> np.ndarray:
+        """Single (1, n_features) row in a per-thread buffer, reused by the next call"""
+        buffers = self._buffers
+        if not hasattr(buffers, "scratch"):
+            buffers.scratch = np.zeros((1, self.n_features), dtype=np.float64)
+            buffers.row = np.zeros((1, self.n_features), dtype=np.float32)
+        scratch = buffers.scratch
+        scratch.fill(0.0)
+        self._term_counts(text, scratch[0])
+        self._weight(scratch)
+        buffers.row[:] = scratch
+        return buffers.row
+
+    # ------------------ SYMPTOM IDS ------------------
+    def symptom_table(self, symptoms) -> np.ndarray:
+        """Row ``sid`` holds the term counts of ``symptoms[sid]``, idf-weighted unless binary"""
+        if self.sublinear_tf:
+            raise ValueError("symptom id features require raw or binary term counts")
+        table = np.zeros((len(symptoms), self.n_features), dtype=np.float64)
+        for sid, symptom in enumerate(symptoms):
+            self._term_counts(symptom, table[sid])
+        if not self.binary:
+            table *= self.idf
+        return table
+
+    def transform_symptom_ids(self, table: np.ndarray, symptom_ids) -> np.ndarray:
+        """Features of the joined symptom texts, summed from ``symptom_table`` rows"""
+        buffers = self._buffers
+        if not hasattr(buffers, "id_row"):
+            buffers.id_row = np.zeros((1, self.n_features), dtype=np.float32)
+        row = table[list(symptom_ids)].sum(axis=0, keepdims=True)
+        if self.binary:
+            # Presence is only known once the counts are summed
+            np.minimum(row, 1.0, out=row)
+            row *= self.idf
+        self._normalize(row)
+        buffers.id_row[:] = row
+        return buffers.id_row
+
+
+def file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_featurizer(path: str = FEATURIZER_PATH, vectorizer_path: str = VECTORIZER_PATH) -> TfidfFeaturizer:
+    """Exported featurizer, falling back to converting vectorizer.pkl if it is missing or stale"""
+    try:
+        return TfidfFeaturizer.load(path, file_hash(vectorizer_path) if os.path.exists(vectorizer_path) else None)
+    except Exception as e:
+        print(f"[WARNING] Featurizer export unusable ({e}); converting {vectorizer_path}")
+        import joblib
+        return TfidfFeaturizer.from_vectorizer(joblib.load(vectorizer_path))
+
+
+def check_parity(featurizer: TfidfFeaturizer, vectorizer, texts) -> int:
+    """Number of rows where the featurizer differs from sklearn's transform"""
+    expected = vectorizer.transform(texts).toarray().astype(np.float32)
+    actual = featurizer.transform(texts)
+    mismatched = int((~np.all(expected == actual, axis=1)).sum())
+    single = sum(not np.array_equal(expected[i:i + 1], featurizer.transform_one(t))
+                 for i, t in enumerate(texts))
+    return mismatched + single
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or verify the NumPy TF-IDF featurizer")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--vectorizer", default=VECTORIZER_PATH)
+    parser.add_argument("--output", default=FEATURIZER_PATH)
+    parser.add_argument("--csv", default=SYMPTOM_CSV_PATH)
+    args = parser.parse_args()
+
+    import joblib
+    vectorizer = joblib.load(args.vectorizer)
+
+    if args.command == "export":
+        TfidfFeaturizer.from_vectorizer(vectorizer).save(args.output, file_hash(args.vectorizer))
+        print(f"✅ Featurizer exported to: {args.output}")
+    else:
+        featurizer = TfidfFeaturizer.load(args.output)
+        with open(args.csv, newline='', encoding='utf-8') as f:
+            texts = [row["symptoms"] for row in csv.DictReader(f)]
+        mismatches = check_parity(featurizer, vectorizer, texts)
+        print(f"{len(texts)} rows checked, {mismatches} mismatches")
+        sys.exit(1 if mismatches else 0)
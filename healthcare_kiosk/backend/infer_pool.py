@@ -0,0 +1,89 @@
+# backend/infer_pool.py
+import asyncio
+from concurrent.futures import Future
+import threading
+import numpy as np
+from openvino.runtime import AsyncInferQueue
+
+
+class InferRequestPool:
+    """Fixed pool of OpenVINO infer requests behind an AsyncInferQueue.
+
+    ``submit`` starts an inference on the next idle request and returns a
+    Future for its output. It only blocks while every request in the pool is
+    busy. ``infer_async`` is the awaitable form for async endpoints.
+    """
+
+    def __init__(self, compiled_model, size: int = 0):
+        # One request per stream keeps every stream busy without oversubscribing
+        self.size = size or compiled_model.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+        self._queue = AsyncInferQueue(compiled_model, self.size)
+        self._queue.set_callback(self._on_done)
+        self._lock = threading.Lock()
+        # start_async reads the idle request id before claiming it, so two
+        # threads can be handed the same request; starts go one at a time
+        self._start_lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+
+    def _on_done(self, request, future: Future):
+        with self._lock:
+            self._completed += 1
+        # A caller that timed out cancelled its future; the others still get theirs
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(request.get_output_tensor(0).data.copy())
+        except Exception as e:
+            future.set_exception(e)
+
+    def submit(self, X: np.ndarray) -> Future:
+        with self._lock:
+            self._submitted += 1
+        return self._start(X)
+
+    def _start(self, X: np.ndarray) -> Future:
+        # Counted as submitted by the caller
+        future = Future()
+        try:
+            with self._start_lock:
+                self._queue.start_async({0: X}, userdata=future)
+        except Exception as e:
+            with self._lock:
+                self._completed += 1
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+        return future
+
+    def _reserve(self) -> bool:
+        """Count a submission only if a request is free for it, so start_async does not wait.
+
+        The one gap: _on_done runs just before OpenVINO marks its request idle,
+        so start_async may wait out the end of a callback, never an inference.
+        """
+        with self._lock:
+            if self._submitted - self._completed >= self.size:
+                return False
+            self._submitted += 1
+            return True
+
+    def infer(self, X: np.ndarray) -> np.ndarray:
+        return self.submit(X).result()
+
+    async def infer_async(self, X: np.ndarray) -> np.ndarray:
+        # Checking is_ready() and then submitting could lose the last free
+        # request to another caller in between and block the event loop
+        if self._reserve():
+            future = self._start(X)
+        else:
+            future = await asyncio.get_running_loop().run_in_executor(None, self.submit, X)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_flight": self._submitted - self._completed,
+                "submitted": self._submitted,
+                "completed": self._completed,
+            }
@@ -1,66 +1,97 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from openvino.runtime import Core
-import numpy as np
-import joblib
-import os
-from symptom_extractor import extract_symptom_keywords
-
-app = FastAPI(title="AI Symptom Checker - Free Text Inference")
+# backend/inference.py
+"""Standalone free-text inference service.
 
-# === Define paths ===
-BASE_DIR = os.path.dirname(__file__)
-MODEL_DIR = os.path.join(BASE_DIR, "models")
-IR_MODEL_PATH = os.path.join(MODEL_DIR, "symptom_model.xml")
-ENCODER_PATH = os.path.join(MODEL_DIR, "vectorizer.pkl")
-LABEL_ENCODER_PATH = os.path.join(MODEL_DIR, "classes.pkl")
+    uvicorn backend.inference:app --port 8001
 
-# === Load OpenVINO model ===
-core = Core()
-model = core.read_model(IR_MODEL_PATH)
-compiled_model = core.compile_model(model=model, device_name="CPU")
-infer_request = compiled_model.create_infer_request()
+Serves the same model as the kiosk backend through ai_symptom_checker, so
+model versions, reloads, backends and the prediction cache behave the same.
+"""
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional, Union
+from . import ai_symptom_checker
+from . import symptoms_extractor
+from .settings import PREDICT_BATCH_MAX_ITEMS
 
-# === Load vectorizer and label encoder ===
-vectorizer = joblib.load(ENCODER_PATH)
-label_encoder = joblib.load(LABEL_ENCODER_PATH)
+app = FastAPI(title="AI Symptom Checker - Free Text Inference")
 
 # === Input schema ===
 class SymptomText(BaseModel):
     user_input: str
 
-from typing import Dict, Any, Union
+class SymptomTextBatch(BaseModel):
+    user_inputs: List[str]
 
 class PredictionResponse(BaseModel):
     prediction: str
     extracted_symptoms: list[str]
     user_input: str
+    model_version: Optional[str] = None
 
 class ErrorResponse(BaseModel):
     error: str
 
+class BatchPrediction(BaseModel):
+    prediction: Optional[str] = None
+    extracted_symptoms: list[str]
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    predictions: List[BatchPrediction]
+    model_version: str
+
+NO_SYMPTOMS_ERROR = "No valid symptoms found in input."
+
 @app.post("/predict", response_model=Union[PredictionResponse, ErrorResponse])
 def predict_from_text(symptom_text: SymptomText) -> Union[PredictionResponse, ErrorResponse]:
     text = symptom_text.user_input.strip()
-    
+
     # Extract symptoms using NLP
-    extracted_symptoms = extract_symptom_keywords(text)
-    
-    if not extracted_symptoms:
-        return ErrorResponse(error="No valid symptoms found in input.")
+    extracted = symptoms_extractor.extract_symptoms_with_ids(text)
 
-    # Convert extracted symptoms to input vector
-    joined_text = " ".join(extracted_symptoms)
-    input_vector = vectorizer.transform([joined_text]).toarray().astype(np.float32)
+    if not extracted.names:
+        return ErrorResponse(error=NO_SYMPTOMS_ERROR)
 
-    # Perform inference
-    result = infer_request.infer({0: input_vector})
-    output = next(iter(result.values()))
-    pred_idx = int(np.argmax(output))
-    pred_label = label_encoder.inverse_transform([pred_idx])[0]
+    model = ai_symptom_checker.active_model()
+    prediction = ai_symptom_checker.predict_condition_from_ids(extracted.ids, extracted.matcher, model)
 
     return PredictionResponse(
-        prediction=pred_label,
-        extracted_symptoms=extracted_symptoms,
-        user_input=text
+        prediction=prediction,
+        extracted_symptoms=extracted.names,
+        user_input=text,
+        model_version=model.version
+    )
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(batch: SymptomTextBatch) -> BatchPredictionResponse:
+    """Predictions for many complaints, in input order, from one model call"""
+    if len(batch.user_inputs) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {PREDICT_BATCH_MAX_ITEMS} inputs per batch")
+
+    extractions = [symptoms_extractor.extract_symptoms_with_ids(text.strip()) for text in batch.user_inputs]
+
+    model = ai_symptom_checker.active_model()
+    # Grouped by vocabulary in case it was replaced while the batch was extracted
+    groups = {}
+    for i, extracted in enumerate(extractions):
+        if extracted.names:
+            groups.setdefault(extracted.matcher, []).append(i)
+    predictions = {}
+    for matcher, positions in groups.items():
+        diagnoses = ai_symptom_checker.predict_conditions_from_ids(
+            [extractions[i].ids for i in positions], matcher, model)
+        predictions.update(zip(positions, diagnoses))
+
+    return BatchPredictionResponse(
+        predictions=[
+            BatchPrediction(prediction=predictions[i], extracted_symptoms=extracted.names)
+            if extracted.names else BatchPrediction(extracted_symptoms=[], error=NO_SYMPTOMS_ERROR)
+            for i, extracted in enumerate(extractions)
+        ],
+        model_version=model.version
     )
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy", "model": ai_symptom_checker.model_status()}
@@ -0,0 +1,264 @@
+# backend/inference_backends.py
+"""Interchangeable engines for the SymptomClassifier MLP.
+
+Every backend takes (n, features) float32 rows and returns (n, classes)
+logits, so callers can switch between them by config:
+
+    openvino     OpenVINO IR through a pool of async infer requests
+    onnxruntime  the exported ONNX model on ONNX Runtime
+    numpy        the IR weights run as plain matmuls, no runtime dependency
+
+    python -m backend.inference_backends check   # argmax agreement on symptoms_disease.csv
+"""
+import argparse
+import asyncio
+from concurrent.futures import Future
+import csv
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+import numpy as np
+from .model_registry import MODELS_ROOT, active_model_dir
+
+# Defaults point at the active model version
+MODEL_DIR = active_model_dir()
+XML_PATH = os.path.join(MODEL_DIR, "symptom_model.xml")
+BIN_PATH = os.path.join(MODEL_DIR, "symptom_model.bin")
+ONNX_PATH = os.path.join(MODEL_DIR, "symptom_model.onnx")
+# Shared by all versions; entries are keyed by the compiled model itself
+OPENVINO_CACHE_DIR = os.path.join(MODELS_ROOT, "ov_cache")
+
+BACKENDS = ("openvino", "onnxruntime", "numpy")
+
+
+class InferenceBackend:
+    """Base interface: ``submit`` returns a Future for the logits of a batch"""
+
+    name = "base"
+
+    def infer(self, X: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def submit(self, X: np.ndarray) -> Future:
+        future = Future()
+        try:
+            future.set_result(self.infer(X))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def infer_async(self, X: np.ndarray) -> np.ndarray:
+        return await asyncio.get_running_loop().run_in_executor(None, self.infer, X)
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+
+# ------------------ OPENVINO ------------------
+# Base properties per compile profile; streams, threads and precision override them
+OPENVINO_PROFILES = {
+    "latency": {"PERFORMANCE_HINT": "LATENCY"},
+    "throughput": {"PERFORMANCE_HINT": "THROUGHPUT"},
+}
+_OPENVINO_PRECISIONS = {"bf16": "bf16", "fp32": "f32", "f32": "f32"}
+
+
+def openvino_compile_config(profile: str = "latency", num_streams: str = "",
+                            num_threads: int = 0, precision: str = "") -> dict:
+    profile = profile.lower()
+    if profile not in OPENVINO_PROFILES:
+        raise ValueError(f"Unknown OpenVINO profile '{profile}', expected one of {tuple(OPENVINO_PROFILES)}")
+    config = dict(OPENVINO_PROFILES[profile])
+    if num_streams:
+        config["NUM_STREAMS"] = num_streams
+    if num_threads:
+        config["INFERENCE_NUM_THREADS"] = num_threads
+    if precision:
+        if precision.lower() not in _OPENVINO_PRECISIONS:
+            raise ValueError(f"Unknown OpenVINO precision '{precision}', expected bf16 or fp32")
+        config["INFERENCE_PRECISION_HINT"] = _OPENVINO_PRECISIONS[precision.lower()]
+    return config
+
+
+def compile_openvino_model(xml_path: str, bin_path: str, n_features: int = 0,
+                           config: dict = None, cache_dir: str = OPENVINO_CACHE_DIR):
+    """Compile the IR for CPU, reusing the on-disk compiled-model cache in ``cache_dir``.
+
+    A positive ``n_features`` reshapes the input to a dynamic batch dimension.
+    """
+    from openvino.runtime import Core
+
+    start = time.perf_counter()
+    core = Core()
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        core.set_property({"CACHE_DIR": cache_dir})
+    model = core.read_model(model=xml_path, weights=bin_path)
+    if n_features:
+        model.reshape([-1, n_features])
+    compiled_model = core.compile_model(model=model, device_name="CPU", config=config or {})
+    print(f"[INFO] OpenVINO model compiled in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(config={config or {}}, cache={cache_dir or 'off'})")
+    return compiled_model
+
+
+class OpenVINOBackend(InferenceBackend):
+    name = "openvino"
+
+    def __init__(self, xml_path: str, bin_path: str, n_features: int, config: dict = None,
+                 cache_dir: str = OPENVINO_CACHE_DIR, infer_requests: int = 0):
+        from .infer_pool import InferRequestPool
+
+        # Dynamic batch dimension so concurrent requests can share one inference
+        self.compiled_model = compile_openvino_model(xml_path, bin_path, n_features, config, cache_dir)
+        self.config = config or {}
+        # Infer requests sized to the compiled model's streams, shared by all callers
+        self.pool = InferRequestPool(self.compiled_model, infer_requests)
+
+    def infer(self, X: np.ndarray) -> np.ndarray:
+        return self.pool.infer(X)
+
+    def submit(self, X: np.ndarray) -> Future:
+        return self.pool.submit(X)
+
+    async def infer_async(self, X: np.ndarray) -> np.ndarray:
+        return await self.pool.infer_async(X)
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "config": self.config, "infer_requests": self.pool.stats()}
+
+
+# ------------------ ONNX RUNTIME ------------------
+class OnnxRuntimeBackend(InferenceBackend):
+    name = "onnxruntime"
+
+    def __init__(self, onnx_path: str, num_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model, self.batched = _onnx_with_dynamic_batch(onnx_path)
+        self.session = ort.InferenceSession(model, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def infer(self, X: np.ndarray) -> np.ndarray:
+        if self.batched:
+            return self.session.run(None, {self.input_name: X})[0]
+        # Exported with a fixed batch of 1
+        return np.concatenate([self.session.run(None, {self.input_name: X[i:i + 1]})[0]
+                               for i in range(len(X))])
+
+
+def _onnx_with_dynamic_batch(onnx_path: str):
+    """Model bytes with a symbolic batch dimension, or the path if onnx is unavailable"""
+    try:
+        import onnx
+    except ImportError:
+        return onnx_path, False
+    model = onnx.load(onnx_path)
+    for value in list(model.graph.input) + list(model.graph.output):
+        value.type.tensor_type.shape.dim[0].dim_param = "batch"
+    return model.SerializeToString(), True
+
+
+# ------------------ NUMPY ------------------
+class NumpyBackend(InferenceBackend):
+    """Linear -> ReLU -> Linear -> ReLU -> Linear, as in train_and_convert_model.py"""
+
+    name = "numpy"
+
+    def __init__(self, layers):
+        # Stored as (in, out) so the forward pass is X @ W + b
+        self.layers = [(np.ascontiguousarray(W.T, dtype=np.float32), b.reshape(1, -1).astype(np.float32))
+                       for W, b in layers]
+
+    @classmethod
+    def from_ir(cls, xml_path: str, bin_path: str) -> "NumpyBackend":
+        return cls(load_ir_linear_layers(xml_path, bin_path))
+
+    def infer(self, X: np.ndarray) -> np.ndarray:
+        h = X
+        last = len(self.layers) - 1
+        for i, (W, b) in enumerate(self.layers):
+            h = h @ W + b
+            if i < last:
+                np.maximum(h, 0, out=h)
+        return h
+
+    async def infer_async(self, X: np.ndarray) -> np.ndarray:
+        # A few small matmuls are cheaper than an executor hop
+        return self.infer(X)
+
+
+_IR_DTYPES = {"f16": np.float16, "f32": np.float32}
+
+
+def load_ir_linear_layers(xml_path: str, bin_path: str) -> list:
+    """(weight (out, in), bias (out,)) pairs of an exported MLP, read from the IR files.
+
+    Relies on the exporter's layout: constants appear in layer order as
+    weight, bias, weight, bias, ... and every MatMul uses transpose_b.
+    """
+    weights = np.fromfile(bin_path, dtype=np.uint8)
+    consts = []
+    for layer in ET.parse(xml_path).getroot().iter("layer"):
+        data = layer.find("data")
+        if layer.get("type") == "MatMul" and data.get("transpose_b") != "true":
+            raise ValueError(f"unsupported MatMul layout in {layer.get('name')}")
+        if layer.get("type") != "Const":
+            continue
+        dtype = _IR_DTYPES[data.get("element_type")]
+        shape = [int(d) for d in data.get("shape").split(",")]
+        offset, size = int(data.get("offset")), int(data.get("size"))
+        consts.append(weights[offset:offset + size].view(dtype).reshape(shape).astype(np.float32))
+
+    if len(consts) % 2:
+        raise ValueError(f"expected weight/bias pairs in {xml_path}")
+    return [(consts[i], consts[i + 1].reshape(-1)) for i in range(0, len(consts), 2)]
+
+
+# ------------------ FACTORY ------------------
+def create_backend(name: str, n_features: int, xml_path: str = XML_PATH, bin_path: str = BIN_PATH,
+                   onnx_path: str = ONNX_PATH, openvino_config: dict = None,
+                   openvino_cache_dir: str = OPENVINO_CACHE_DIR, infer_requests: int = 0,
+                   num_threads: int = 0, layers=None) -> InferenceBackend:
+    """``layers`` lets the numpy backend use bundle weights instead of reading the IR"""
+    name = name.lower()
+    if name == "openvino":
+        return OpenVINOBackend(xml_path, bin_path, n_features, openvino_config, openvino_cache_dir, infer_requests)
+    if name == "onnxruntime":
+        return OnnxRuntimeBackend(onnx_path, num_threads)
+    if name == "numpy":
+        return NumpyBackend(layers) if layers is not None else NumpyBackend.from_ir(xml_path, bin_path)
+    raise ValueError(f"Unknown inference backend '{name}', expected one of {BACKENDS}")
+
+
+def compare_backends(backends: dict, X: np.ndarray) -> dict:
+    """Rows whose argmax differs from the first backend, per backend name"""
+    predictions = {name: backend.infer(X).argmax(axis=1) for name, backend in backends.items()}
+    reference = next(iter(predictions.values()))
+    return {name: int((pred != reference).sum()) for name, pred in predictions.items()}
+
+
+if __name__ == "__main__":
+    from .featurizer import SYMPTOM_CSV_PATH, load_featurizer
+
+    parser = argparse.ArgumentParser(description="Check that every inference backend agrees")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--csv", default=SYMPTOM_CSV_PATH)
+    args = parser.parse_args()
+
+    featurizer = load_featurizer()
+    with open(args.csv, newline='', encoding='utf-8') as f:
+        X = featurizer.transform([row["symptoms"] for row in csv.DictReader(f)])
+    backends = {}
+    for name in BACKENDS:
+        try:
+            backends[name] = create_backend(name, featurizer.n_features)
+        except ImportError as e:
+            print(f"[WARNING] Skipping {name}: {e}")
+    disagreements = compare_backends(backends, X)
+    print(f"{len(X)} rows checked, argmax disagreements vs {next(iter(backends))}: {disagreements}")
+    sys.exit(1 if any(disagreements.values()) else 0)
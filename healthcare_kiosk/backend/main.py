@@ -1,16 +1,30 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, BackgroundTasks, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from .database import models, crud, database
-from .database.database import SessionLocal, init_db
+from .database import models, crud, async_crud, database, bulk_import, bulk_export
+from .database.database import SessionLocal, AsyncSessionLocal, init_db
+from .database.write_behind import WriteBehindQueue
 from . import ai_symptom_checker
-from .symptoms_extractor import extract_symptom_keywords
-from pydantic import BaseModel, validator
+from . import symptoms_extractor
+from . import model_registry
+from .diagnosis_pool import DiagnosisPool, DiagnosisPoolBusy
+from .schemas import PatientCreate, VitalsCreate, SymptomInput, DiagnosisResponse, LoginResponse, check_vitals
+from .settings import (
+    PREDICTION_CACHE_PREWARM, MODEL_WATCH_INTERVAL_S, ADMIN_TOKEN, DIAGNOSE_WORKERS, DIAGNOSE_MAX_PENDING,
+    EHR_PAGE_SIZE, EHR_MAX_PAGE_SIZE, WRITE_BEHIND_MAX_BATCH_SIZE, WRITE_BEHIND_MAX_WAIT_MS,
+    WRITE_BEHIND_MAX_PENDING, BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_REJECTS_DIR,
+)
+import asyncio
+from datetime import datetime, timezone
+import hmac
+import io
 import os
-from typing import List, Optional
+from typing import Optional
 import logging
 
 # Configure logging
@@ -75,63 +89,16 @@ def get_db():
     finally:
         db.close()
 
-# Pydantic models for request/response validation
-class PatientCreate(BaseModel):
-    aadhaar: str
-    name: str
-    age: int
-    gender: str
-    
-    @validator('aadhaar')
-    def validate_aadhaar(cls, v):
-        if not v or len(v) != 12:
-            raise ValueError('Aadhaar must be exactly 12 digits')
-        if not v.isdigit():
-            raise ValueError('Aadhaar must contain only digits')
-        return v
-    
-    @validator('name')
-    def validate_name(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Name cannot be empty')
-        return v.strip()
-    
-    @validator('age')
-    def validate_age(cls, v):
-        if v < 1 or v > 120:
-            raise ValueError('Age must be between 1 and 120')
-        return v
-    
-    @validator('gender')
-    def validate_gender(cls, v):
-        if v not in ['Male', 'Female', 'Other']:
-            raise ValueError('Gender must be Male, Female, or Other')
-        return v
-
-class VitalsCreate(BaseModel):
-    patient_id: int
-    height: float
-    weight: float
-    bp: str
-    pulse: int
-
-class SymptomInput(BaseModel):
-    user_input: str
-    patient_id: int
-
-class DiagnosisResponse(BaseModel):
-    diagnosis: str
-    extracted_symptoms: List[str]
-    user_input: str
-    patient_id: int
-    diagnosis_id: int
-
-class LoginResponse(BaseModel):
-    patient_id: int
-    name: str
-    age: int
-    gender: str
-    message: str
+# Async session for the request-path endpoints; DB waits hold no threadpool slot
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Group commit for /vitals and /diagnose inserts, on its own connection (None when disabled)
+write_behind = WriteBehindQueue(
+    database.create_async_db_engine(pool_size=1),
+    WRITE_BEHIND_MAX_BATCH_SIZE, WRITE_BEHIND_MAX_WAIT_MS, WRITE_BEHIND_MAX_PENDING
+) if WRITE_BEHIND_MAX_BATCH_SIZE > 0 else None
 
 # ------------------ Root Endpoint ------------------
 @app.get("/")
@@ -145,34 +112,37 @@ async def root():
             "login": "GET /login?aadhaar={aadhaar} - Login with Aadhaar",
             "vitals": "POST /vitals - Add patient vitals",
             "diagnose": "POST /diagnose - AI symptom diagnosis",
-            "ehr": "GET /ehr?patient_id={id} - Get patient EHR",
+            "ehr": "GET /ehr?patient_id={id}[&limit=&vitals_before=&diagnoses_before=] - Get patient EHR",
             "test-db": "GET /test-db - Test database connectivity",
+            "metrics": "GET /metrics - Cache and performance statistics",
+            "models": "GET /admin/models - Model versions (admin)",
+            "reload-model": "POST /admin/models/reload?version={version} - Hot-swap the model (admin)",
+            "bulk-import": "POST /bulk/import?kind={patients|vitals|diagnoses} - CSV or NDJSON body (admin)",
+            "bulk-export": "GET /bulk/export?kind={patients|vitals|diagnoses|all} - Streamed NDJSON or CSV (admin)",
             "docs": "GET /docs - API documentation"
         }
     }
 
 # ------------------ Patient Registration ------------------
 @app.post("/register")
-def register_patient(patient_data: PatientCreate, db: Session = Depends(get_db)):
+async def register_patient(patient_data: PatientCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new patient with detailed error logging"""
     try:
         logger.info(f"Registration request received: {patient_data}")
         
-        # Check if patient already exists
-        existing_patient = crud.get_patient_by_aadhaar(db, patient_data.aadhaar)
-        if existing_patient:
+        # Create new patient; the unique Aadhaar index rejects duplicates
+        try:
+            patient = await async_crud.create_patient(
+                db, 
+                patient_data.aadhaar, 
+                patient_data.name, 
+                patient_data.age, 
+                patient_data.gender
+            )
+        except crud.PatientAlreadyExists:
             logger.error(f"Patient already exists with Aadhaar: {patient_data.aadhaar}")
             raise HTTPException(status_code=400, detail="Patient with this Aadhaar already registered")
         
-        # Create new patient
-        patient = crud.create_patient(
-            db, 
-            patient_data.aadhaar, 
-            patient_data.name, 
-            patient_data.age, 
-            patient_data.gender
-        )
-        
         if not patient:
             logger.error("Failed to create patient in database")
             raise HTTPException(status_code=500, detail="Failed to create patient")
@@ -193,13 +163,13 @@ def register_patient(patient_data: PatientCreate, db: Session = Depends(get_db))
 
 # ------------------ Patient Login ------------------
 @app.get("/login", response_model=LoginResponse)
-def login_patient(aadhaar: str, db: Session = Depends(get_db)):
+async def login_patient(aadhaar: str, db: AsyncSession = Depends(get_async_db)):
     """Login patient using Aadhaar number"""
     try:
         if len(aadhaar) != 12:
             raise HTTPException(status_code=400, detail="Aadhaar must be exactly 12 digits")
         
-        patient = crud.get_patient_by_aadhaar(db, aadhaar)
+        patient = await async_crud.get_patient_by_aadhaar(db, aadhaar)
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found. Please register first.")
         
@@ -248,27 +218,27 @@ def login_by_name(name: str, db: Session = Depends(get_db)):
 
 # ------------------ Vitals Management ------------------
 @app.post("/vitals")
-def add_patient_vitals(vitals_data: VitalsCreate, db: Session = Depends(get_db)):
+async def add_patient_vitals(vitals_data: VitalsCreate, db: AsyncSession = Depends(get_async_db)):
     """Add vital signs for a patient"""
     try:
-        patient = db.query(models.Patient).filter_by(id=vitals_data.patient_id).first()
-        if not patient:
-            raise HTTPException(status_code=404, detail="Patient not found")
-        
-        if vitals_data.height <= 0 or vitals_data.weight <= 0:
-            raise HTTPException(status_code=400, detail="Height and weight must be positive values")
-        
-        if vitals_data.pulse <= 0:
-            raise HTTPException(status_code=400, detail="Pulse must be a positive value")
+        try:
+            check_vitals(vitals_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        vitals = crud.add_vitals(
-            db,
-            vitals_data.patient_id,
-            vitals_data.height,
-            vitals_data.weight,
-            vitals_data.bp,
-            vitals_data.pulse
-        )
+        # The patient foreign key doubles as the existence check
+        try:
+            vitals = await async_crud.add_vitals(
+                db,
+                vitals_data.patient_id,
+                vitals_data.height,
+                vitals_data.weight,
+                vitals_data.bp,
+                vitals_data.pulse,
+                writer=write_behind
+            )
+        except crud.PatientNotFound:
+            raise HTTPException(status_code=404, detail="Patient not found")
         
         if not vitals:
             raise HTTPException(status_code=500, detail="Failed to add vitals")
@@ -284,7 +254,7 @@ def add_patient_vitals(vitals_data: VitalsCreate, db: Session = Depends(get_db))
         return {
             "message": "Vitals recorded successfully",
             "vitals_id": vitals.id,
-            "patient_name": patient.name,
+            "patient_name": vitals.patient_name,
             "bmi": vitals.bmi,
             "bmi_category": bmi_category,
             "status": "success"
@@ -297,21 +267,27 @@ def add_patient_vitals(vitals_data: VitalsCreate, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail=f"Adding vitals failed: {str(e)}")
 
 # ------------------ AI Symptom Checker ------------------
+# Extraction and prediction, off the event loop and optionally out of process
+diagnosis_pool = DiagnosisPool(DIAGNOSE_WORKERS, DIAGNOSE_MAX_PENDING)
+
 @app.post("/diagnose", response_model=DiagnosisResponse)
-def diagnose_symptoms(symptom_input: SymptomInput, db: Session = Depends(get_db)):
+async def diagnose_symptoms(symptom_input: SymptomInput, db: AsyncSession = Depends(get_async_db)):
     """AI-powered symptom analysis and disease prediction"""
     try:
-        patient = db.query(models.Patient).filter_by(id=symptom_input.patient_id).first()
-        if not patient:
-            raise HTTPException(status_code=404, detail="Patient not found")
-        
         if not symptom_input.user_input or not symptom_input.user_input.strip():
             raise HTTPException(status_code=400, detail="Symptom description cannot be empty")
         
-        logger.info(f"Processing symptoms for patient: {patient.name}")
+        logger.info(f"Processing symptoms for patient ID: {symptom_input.patient_id}")
         logger.info(f"User input: {symptom_input.user_input}")
         
-        extracted_symptoms = extract_symptom_keywords(symptom_input.user_input)
+        # Pin the model so the recorded version is the one that made the prediction
+        model = ai_symptom_checker.active_model()
+        try:
+            result = await diagnosis_pool.run(symptom_input.user_input, model)
+        except DiagnosisPoolBusy as busy:
+            logger.warning(f"Diagnosis rejected: {busy}")
+            raise HTTPException(status_code=503, detail="Too many diagnoses in progress, please retry shortly")
+        extracted_symptoms = result.names
         
         if not extracted_symptoms:
             raise HTTPException(
@@ -320,23 +296,22 @@ def diagnose_symptoms(symptom_input: SymptomInput, db: Session = Depends(get_db)
             )
         
         logger.info(f"Extracted symptoms: {extracted_symptoms}")
-        
-        symptoms_text = " ".join(extracted_symptoms)
-        
-        try:
-            diagnosis = ai_symptom_checker.predict_condition(symptoms_text)
-            logger.info(f"AI diagnosis: {diagnosis}")
-        except Exception as ai_error:
-            logger.error(f"AI prediction failed: {ai_error}")
-            diagnosis = "Unable to determine condition. Please consult a healthcare professional."
+        diagnosis = result.diagnosis
+        logger.info(f"AI diagnosis: {diagnosis}")
         
         symptoms_for_db = ",".join(extracted_symptoms)
-        diagnosis_record = crud.add_diagnosis(
-            db, 
-            symptom_input.patient_id, 
-            symptoms_for_db, 
-            diagnosis
-        )
+        # The patient foreign key doubles as the existence check
+        try:
+            diagnosis_record = await async_crud.add_diagnosis(
+                db,
+                symptom_input.patient_id, 
+                symptoms_for_db, 
+                diagnosis,
+                model_version=result.model_version,
+                writer=write_behind
+            )
+        except crud.PatientNotFound:
+            raise HTTPException(status_code=404, detail="Patient not found")
         
         if not diagnosis_record:
             raise HTTPException(status_code=500, detail="Failed to save diagnosis")
@@ -346,7 +321,8 @@ def diagnose_symptoms(symptom_input: SymptomInput, db: Session = Depends(get_db)
             extracted_symptoms=extracted_symptoms,
             user_input=symptom_input.user_input,
             patient_id=symptom_input.patient_id,
-            diagnosis_id=diagnosis_record.id
+            diagnosis_id=diagnosis_record.id,
+            model_version=result.model_version
         )
         
     except HTTPException:
@@ -357,39 +333,51 @@ def diagnose_symptoms(symptom_input: SymptomInput, db: Session = Depends(get_db)
 
 # ------------------ Electronic Health Record ------------------
 @app.get("/ehr")
-def get_patient_ehr(patient_id: int, db: Session = Depends(get_db)):
-    """Retrieve complete Electronic Health Record for a patient"""
+async def get_patient_ehr(
+    patient_id: int,
+    limit: int = Query(EHR_PAGE_SIZE, ge=1, le=EHR_MAX_PAGE_SIZE),
+    vitals_before: Optional[str] = None,
+    diagnoses_before: Optional[str] = None,
+    vitals_since: Optional[datetime] = None,
+    vitals_until: Optional[datetime] = None,
+    diagnoses_since: Optional[datetime] = None,
+    diagnoses_until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Retrieve a patient's Electronic Health Record, newest records first.
+
+    Each section returns up to ``limit`` records; pass its
+    ``pagination.<section>.next_before`` back as ``<section>_before`` for the
+    next page. ``*_since`` / ``*_until`` restrict a section to a time range.
+    """
     try:
-        ehr = crud.get_patient_ehr(db, patient_id)
+        ehr = await async_crud.get_patient_ehr(
+            db, patient_id, limit,
+            vitals_before=vitals_before,
+            diagnoses_before=diagnoses_before,
+            vitals_since=_naive_utc(vitals_since),
+            vitals_until=_naive_utc(vitals_until),
+            diagnoses_since=_naive_utc(diagnoses_since),
+            diagnoses_until=_naive_utc(diagnoses_until)
+        )
         if not ehr:
             raise HTTPException(status_code=404, detail="No EHR found for this patient")
-        
-        ehr["summary"] = {
-            "total_vitals_records": len(ehr["vitals"]),
-            "total_diagnoses": len(ehr["diagnoses"]),
-            "last_visit": None
-        }
-        
-        if ehr["vitals"] or ehr["diagnoses"]:
-            all_timestamps = []
-            for vital in ehr["vitals"]:
-                if vital["timestamp"]:
-                    all_timestamps.append(vital["timestamp"])
-            for diagnosis in ehr["diagnoses"]:
-                if diagnosis["timestamp"]:
-                    all_timestamps.append(diagnosis["timestamp"])
-            
-            if all_timestamps:
-                ehr["summary"]["last_visit"] = max(all_timestamps)
-        
         return ehr
         
+    except crud.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=f"Invalid pagination cursor: {e}")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"EHR retrieval failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"EHR retrieval failed: {str(e)}")
 
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are stored as naive UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 # ------------------ Database Testing ------------------
 @app.get("/test-db")
 def test_database_connection(db: Session = Depends(get_db)):
@@ -431,6 +419,200 @@ def health_check():
         "version": "1.0.0"
     }
 
+# ------------------ Metrics ------------------
+@app.get("/metrics")
+def get_metrics():
+    """Cache and performance statistics"""
+    return {
+        "symptom_extraction": symptoms_extractor.cache_stats(),
+        "symptom_inference": ai_symptom_checker.inference_stats(),
+        "diagnosis_pool": diagnosis_pool.stats(),
+        "write_behind": write_behind.stats() if write_behind else None
+    }
+
+# ------------------ Model Administration ------------------
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def warm_prediction_cache(model=None) -> int:
+    """Pre-warm the prediction cache with the most frequent past symptom sets"""
+    if PREDICTION_CACHE_PREWARM <= 0:
+        return 0
+    db = SessionLocal()
+    try:
+        symptom_sets = crud.get_frequent_symptom_sets(db, PREDICTION_CACHE_PREWARM)
+    finally:
+        db.close()
+    return ai_symptom_checker.prewarm_prediction_cache(
+        symptom_sets, symptoms_extractor.get_symptom_matcher(), model
+    )
+
+def reload_model_in_background(version: Optional[str]):
+    try:
+        ai_symptom_checker.reload_model(version, warm=warm_prediction_cache)
+        # Only a version that loaded is written to ACTIVE, so restarts never pick up a broken one
+        if version:
+            model_registry.set_active_version(version)
+    except Exception as e:
+        logger.error(f"Model reload failed: {str(e)}")
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def list_model_versions():
+    """Available model versions and the one being served"""
+    return {
+        "versions": model_registry.list_versions(),
+        "configured": model_registry.active_version(),
+        **ai_symptom_checker.model_status()
+    }
+
+@app.post("/admin/models/reload", status_code=202, dependencies=[Depends(require_admin)])
+def reload_model(background_tasks: BackgroundTasks, version: Optional[str] = None):
+    """Load and warm a model version in the background, then swap it in.
+
+    A given version is written to models/ACTIVE once it has loaded, so restarts
+    and other workers pick it up; without one the ACTIVE version is (re)loaded.
+    """
+    if version:
+        try:
+            model_registry.check_version(version)
+        except (ValueError, FileNotFoundError) as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    background_tasks.add_task(reload_model_in_background, version)
+    return {
+        "status": "Reload scheduled",
+        "version": version or model_registry.active_version(),
+        "active": ai_symptom_checker.active_model().version
+    }
+
+# ------------------ Bulk Import ------------------
+# Body chunks (a few KiB each) buffered between the request and the import; the
+# client is not read from while the import is this far behind
+BULK_IMPORT_QUEUE_CHUNKS = 16
+
+class RequestBodyReader(io.RawIOBase):
+    """Blocking file view of a request body, read in a worker thread while the
+    event loop feeds ``chunks`` (bytes, then None at the end or an exception)"""
+
+    def __init__(self, chunks: asyncio.Queue, loop: asyncio.AbstractEventLoop):
+        self._chunks = chunks
+        self._loop = loop
+        self._pending = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._eof:
+                return 0
+            chunk = asyncio.run_coroutine_threadsafe(self._chunks.get(), self._loop).result()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending = chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+@app.post("/bulk/import", dependencies=[Depends(require_admin)])
+async def bulk_import_records(
+    request: Request,
+    kind: str,
+    format: Optional[str] = None,
+    chunk_size: int = Query(BULK_IMPORT_CHUNK_SIZE, ge=1, le=10000)
+):
+    """Import patients, vitals or diagnoses from a CSV or NDJSON body.
+
+    Rows are validated like /register and /vitals and inserted in chunks;
+    ``format`` defaults from the Content-Type. Rejected rows are written to
+    ``rejects_file`` with the reason. See backend/database/bulk_import.py
+    for the columns.
+    """
+    if kind not in bulk_import.KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {sorted(bulk_import.KINDS)}")
+    fmt = format or bulk_import.detect_format("", request.headers.get("content-type", ""))
+    if fmt not in bulk_import.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(bulk_import.FORMATS)}")
+
+    os.makedirs(BULK_IMPORT_REJECTS_DIR, exist_ok=True)
+    rejects_path = os.path.join(BULK_IMPORT_REJECTS_DIR,
+                                f"{kind}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.ndjson")
+    # The body is imported as it arrives: chunks go through a bounded queue to
+    # the worker thread, so neither memory nor disk holds the whole file
+    chunks = asyncio.Queue(maxsize=BULK_IMPORT_QUEUE_CHUNKS)
+
+    async def feed():
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await chunks.put(chunk)
+            await chunks.put(None)
+        except Exception as e:
+            # e.g. the client disconnected: fail the import rather than take the truncated body as complete
+            await chunks.put(e)
+
+    feeder = asyncio.create_task(feed())
+    stream = io.TextIOWrapper(io.BufferedReader(RequestBodyReader(chunks, asyncio.get_running_loop())),
+                              encoding="utf-8", newline="")
+    try:
+        stats = await run_in_threadpool(bulk_import.import_stream, kind, stream, fmt, rejects_path, chunk_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 text")
+    except Exception as e:
+        logger.error(f"Bulk import failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Bulk import failed: {str(e)}")
+    finally:
+        # An import that stopped early leaves the feeder waiting on a full queue
+        feeder.cancel()
+
+    logger.info(f"Bulk import of {kind}: {stats['inserted']} inserted, {stats['rejected']} rejected")
+    return stats
+
+# ------------------ Bulk Export ------------------
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@app.get("/bulk/export", dependencies=[Depends(require_admin)])
+def bulk_export_records(
+    kind: str,
+    format: str = "ndjson",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    gzip: bool = False
+):
+    """Stream patients, vitals, diagnoses or "all" of them as NDJSON or CSV.
+
+    Rows are read in batches and written as they are read, so memory does not
+    grow with the database. ``since``/``until`` (ISO 8601 dates or date-times,
+    as the CLI takes them) select records with since <= timestamp < until.
+    With ``gzip`` the download is compressed on the fly. See
+    backend/database/bulk_export.py for the columns.
+    """
+    try:
+        since_at = bulk_export.parse_datetime(since) if since else None
+        until_at = bulk_export.parse_datetime(until) if until else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"since/until must be ISO 8601 dates or date-times: {e}")
+    try:
+        stream = bulk_export.stream_export(kind, format, since_at, until_at, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = bulk_export.export_filename(kind, format, gzip)
+    logger.info(f"Bulk export of {kind} as {format}{' (gzip)' if gzip else ''} started")
+    # A sync iterator: Starlette advances it on the threadpool, one chunk at a time
+    return StreamingResponse(
+        stream,
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ------------------ Startup Event ------------------
 @app.on_event("startup")
 async def startup_event():
@@ -438,9 +620,31 @@ async def startup_event():
     print("🏥 Healthcare Kiosk API Starting...")
     print("✅ Database initialized")
     print("✅ AI Symptom Checker loaded")
+    print(f"✅ Serving model version {ai_symptom_checker.active_model().version}")
+    try:
+        warmed = warm_prediction_cache()
+        print(f"✅ Prediction cache pre-warmed with {warmed} symptom sets")
+    except Exception as e:
+        logger.error(f"Prediction cache pre-warm failed: {str(e)}")
+    if MODEL_WATCH_INTERVAL_S > 0:
+        ai_symptom_checker.start_model_watcher(MODEL_WATCH_INTERVAL_S, warm=warm_prediction_cache)
+    await run_in_threadpool(diagnosis_pool.start)
+    print(f"✅ Diagnosis pool: {diagnosis_pool.stats()['mode']}")
+    if write_behind:
+        write_behind.start()
+        print(f"✅ Write-behind: up to {write_behind.max_batch_size} inserts / "
+              f"{write_behind.max_wait_ms:g} ms per commit")
     print("✅ All endpoints registered")
     print("🚀 Server ready to accept requests!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    diagnosis_pool.close()
+    if write_behind:
+        # Commit what is still queued before the process exits
+        await write_behind.close()
+    await database.async_engine.dispose()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,218 @@
+# backend/model_bundle.py
+"""Single-file model bundle: featurizer, MLP weights, labels and manifest.
+
+Layout of ``symptom_model.kbundle``::
+
+    b"KIOSKMDL"  8-byte magic
+    uint64       little-endian length of the JSON header
+    header       JSON: vocabulary terms, class labels, featurizer settings,
+                 the manifest and an index of every array (dtype, shape, offset)
+    arrays       raw little-endian data, each aligned to 64 bytes
+
+Arrays are read through one read-only memory map, so loading does no
+unpickling and copies nothing until a backend needs its own layout.
+
+    python -m backend.model_bundle pack models/v1     # build from legacy files
+    python -m backend.model_bundle verify models/v1   # check the manifest hashes
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+from .featurizer import TfidfFeaturizer
+
+BUNDLE_FILE = "symptom_model.kbundle"
+BUNDLE_FORMAT_VERSION = 1
+_MAGIC = b"KIOSKMDL"
+_ALIGNMENT = 64
+
+
+def _array_hash(array: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+class ModelBundle:
+    """Loaded bundle; ``layers`` are (weight (out, in), bias (out,)) pairs"""
+
+    def __init__(self, terms, classes, featurizer_settings: dict, idf: np.ndarray,
+                 layers, manifest: dict = None, path: str = None):
+        self.terms = list(terms)
+        self.classes = np.array(classes)
+        self.featurizer_settings = dict(featurizer_settings)
+        self.idf = idf
+        self.layers = list(layers)
+        self.manifest = manifest or {}
+        self.path = path
+
+    @property
+    def n_features(self) -> int:
+        return len(self.terms)
+
+    def featurizer(self) -> TfidfFeaturizer:
+        return TfidfFeaturizer({term: col for col, term in enumerate(self.terms)}, self.idf,
+                               **self.featurizer_settings)
+
+    def arrays(self) -> dict:
+        arrays = {"idf": np.asarray(self.idf, dtype=np.float64)}
+        for i, (weight, bias) in enumerate(self.layers):
+            arrays[f"layer{i}.weight"] = np.asarray(weight, dtype=np.float32)
+            arrays[f"layer{i}.bias"] = np.asarray(bias, dtype=np.float32)
+        return arrays
+
+    def content_hash(self) -> str:
+        """Hash of everything that affects predictions"""
+        digest = hashlib.sha256(json.dumps(
+            [self.terms, self.classes.tolist(), self.featurizer_settings], sort_keys=True).encode())
+        for name, array in self.arrays().items():
+            digest.update(name.encode())
+            digest.update(_array_hash(array).encode())
+        return digest.hexdigest()
+
+    # ------------------ WRITE ------------------
+    def save(self, path: str):
+        arrays = self.arrays()
+        index, offset = {}, 0
+        for name, array in arrays.items():
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            index[name] = {
+                "dtype": array.dtype.newbyteorder("<").str,
+                "shape": list(array.shape),
+                "offset": offset,
+                "sha256": _array_hash(array),
+            }
+            offset += array.nbytes
+        manifest = dict(self.manifest, content_hash=self.content_hash())
+        header = json.dumps({
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "terms": self.terms,
+            "classes": self.classes.tolist(),
+            "featurizer": self.featurizer_settings,
+            "manifest": manifest,
+            "arrays": index,
+        }).encode()
+
+        # Data starts on an aligned boundary after magic, length and header
+        data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGNMENT) * _ALIGNMENT
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + index[name]["offset"])
+                f.write(np.ascontiguousarray(array, dtype=index[name]["dtype"]).tobytes())
+        os.replace(tmp_path, path)
+        self.manifest = manifest
+        self.path = path
+
+    # ------------------ READ ------------------
+    @classmethod
+    def load(cls, path: str, verify: bool = False) -> "ModelBundle":
+        """Memory-map a bundle; ``verify`` re-hashes every array against the header"""
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a model bundle")
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+            if header.get("format_version") != BUNDLE_FORMAT_VERSION:
+                raise ValueError(f"{path}: format version {header.get('format_version')} != {BUNDLE_FORMAT_VERSION}")
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data_start = -(-(len(_MAGIC) + 8 + header_size) // _ALIGNMENT) * _ALIGNMENT
+        arrays = {}
+        for name, entry in header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            array = np.frombuffer(buffer, dtype=dtype, count=count,
+                                  offset=data_start + entry["offset"]).reshape(entry["shape"])
+            if verify and _array_hash(array) != entry["sha256"]:
+                raise ValueError(f"{path}: array {name} does not match its hash")
+            arrays[name] = array
+
+        layers = []
+        while f"layer{len(layers)}.weight" in arrays:
+            i = len(layers)
+            layers.append((arrays[f"layer{i}.weight"], arrays[f"layer{i}.bias"]))
+        return cls(header["terms"], header["classes"], header["featurizer"], arrays["idf"],
+                   layers, header["manifest"], path)
+
+    @classmethod
+    def from_dir(cls, model_dir: str) -> "ModelBundle":
+        """Bundle of a version directory, packed in memory for versions without one"""
+        path = os.path.join(model_dir, BUNDLE_FILE)
+        if os.path.exists(path):
+            return cls.load(path)
+        return pack_legacy(model_dir)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_bundle(model_dir: str) -> list:
+    """Problems found checking the bundle and the files its manifest hashes"""
+    problems = []
+    try:
+        bundle = ModelBundle.load(os.path.join(model_dir, BUNDLE_FILE), verify=True)
+    except Exception as e:
+        return [str(e)]
+    if bundle.content_hash() != bundle.manifest.get("content_hash"):
+        problems.append("content hash mismatch")
+    for name, expected in bundle.manifest.get("files", {}).items():
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            problems.append(f"{name} missing")
+        elif file_sha256(path) != expected:
+            problems.append(f"{name} does not match the manifest")
+    return problems
+
+
+def pack_legacy(model_dir: str) -> ModelBundle:
+    """Bundle a version directory from vectorizer.pkl / featurizer.npz, classes.pkl and the IR"""
+    import joblib
+    from .featurizer import load_featurizer
+    from .inference_backends import load_ir_linear_layers
+
+    featurizer = load_featurizer(os.path.join(model_dir, "featurizer.npz"),
+                                 os.path.join(model_dir, "vectorizer.pkl"))
+    xml_path = os.path.join(model_dir, "symptom_model.xml")
+    bin_path = os.path.join(model_dir, "symptom_model.bin")
+    files = [name for name in ("symptom_model.xml", "symptom_model.bin", "symptom_model.onnx")
+             if os.path.exists(os.path.join(model_dir, name))]
+    return ModelBundle(
+        featurizer.terms(),
+        joblib.load(os.path.join(model_dir, "classes.pkl")),
+        featurizer.settings(),
+        featurizer.idf,
+        load_ir_linear_layers(xml_path, bin_path),
+        manifest={
+            "source": "packed from legacy artifacts",
+            "files": {name: file_sha256(os.path.join(model_dir, name)) for name in files},
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify a model bundle")
+    parser.add_argument("command", choices=["pack", "verify"])
+    parser.add_argument("model_dir", help="model version directory, e.g. backend/models/v1")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        bundle = pack_legacy(args.model_dir)
+        bundle.save(os.path.join(args.model_dir, BUNDLE_FILE))
+        print(f"✅ Bundle written to: {bundle.path}")
+    else:
+        problems = verify_bundle(args.model_dir)
+        for problem in problems:
+            print(f"[ERROR] {problem}")
+        print("Bundle OK" if not problems else f"{len(problems)} problem(s) found")
+        sys.exit(1 if problems else 0)
@@ -0,0 +1,95 @@
+# backend/model_registry.py
+"""Versioned model directories.
+
+Each trained model lives in its own directory under models/, and the ACTIVE
+file names the version the backend serves:
+
+    models/
+        ACTIVE            e.g. "v2"
+        v1/               symptom_model.kbundle, symptom_model.xml/.bin/.onnx
+        v2/               ...
+
+Versions predating the bundle hold classes.pkl, featurizer.npz and
+vectorizer.pkl instead of symptom_model.kbundle.
+
+To roll out a retrained model, train it into a new version directory with
+``python -m backend.train_and_convert_model --version v2``, then switch with
+``python -m backend.model_registry activate v2`` or ``POST /admin/models/reload``.
+"""
+import argparse
+import os
+
+MODELS_ROOT = os.path.join(os.path.dirname(__file__), "models")
+ACTIVE_PATH = os.path.join(MODELS_ROOT, "ACTIVE")
+# A version directory holds a model bundle, or classes.pkl for older versions
+_MARKER_FILES = ("symptom_model.kbundle", "classes.pkl")
+
+
+def _is_version_dir(path: str) -> bool:
+    return any(os.path.isfile(os.path.join(path, name)) for name in _MARKER_FILES)
+
+
+def version_dir(version: str) -> str:
+    if not version or os.path.basename(version) != version or version.startswith("."):
+        raise ValueError(f"Invalid model version '{version}'")
+    return os.path.join(MODELS_ROOT, version)
+
+
+def list_versions() -> list:
+    if not os.path.isdir(MODELS_ROOT):
+        return []
+    return sorted(
+        name for name in os.listdir(MODELS_ROOT)
+        if _is_version_dir(os.path.join(MODELS_ROOT, name))
+    )
+
+
+def active_version() -> str:
+    """Version named in ACTIVE, or the newest version directory if there is none"""
+    try:
+        with open(ACTIVE_PATH, encoding='utf-8') as f:
+            version = f.read().strip()
+        if version:
+            return version
+    except FileNotFoundError:
+        pass
+    versions = list_versions()
+    if not versions:
+        raise FileNotFoundError(f"No model versions found in {MODELS_ROOT}")
+    return versions[-1]
+
+
+def active_model_dir() -> str:
+    return version_dir(active_version())
+
+
+def check_version(version: str):
+    """Raises ValueError or FileNotFoundError unless ``version`` is a model version directory"""
+    if not _is_version_dir(version_dir(version)):
+        raise FileNotFoundError(f"Model version '{version}' not found in {MODELS_ROOT}")
+
+
+def set_active_version(version: str):
+    """Point ACTIVE at ``version``; the rename makes the switch atomic for readers"""
+    check_version(version)
+    tmp_path = f"{ACTIVE_PATH}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version + "\n")
+    os.replace(tmp_path, ACTIVE_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List or activate model versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list")
+    activate = subparsers.add_parser("activate")
+    activate.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        current = active_version()
+        for version in list_versions():
+            print(f"{'*' if version == current else ' '} {version}")
+    else:
+        set_active_version(args.version)
+        print(f"✅ Active model version: {args.version}")
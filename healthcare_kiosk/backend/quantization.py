@@ -0,0 +1,159 @@
+# backend/quantization.py
+"""INT8 post-training quantization of a model version's OpenVINO IR.
+
+    python -m backend.quantization backend/models/v2
+
+Calibrates on symptoms_disease.csv with NNCF, writes symptom_model_int8.xml/.bin
+next to the original IR, and an int8_report.json comparing the two: top-1
+agreement, per-class metrics against the CSV labels and CPU latency for single
+rows and one full batch. The backend only serves the INT8 variant
+(KIOSK_MODEL_VARIANT=int8) while the report's agreement passes
+KIOSK_INT8_MIN_AGREEMENT.
+"""
+import argparse
+import csv
+from datetime import datetime, timezone
+import json
+import os
+import sys
+import time
+import numpy as np
+from .featurizer import SYMPTOM_CSV_PATH
+from .inference_backends import compile_openvino_model
+from .model_bundle import ModelBundle, file_sha256
+
+XML_FILE = "symptom_model.xml"
+BIN_FILE = "symptom_model.bin"
+INT8_XML_FILE = "symptom_model_int8.xml"
+INT8_BIN_FILE = "symptom_model_int8.bin"
+REPORT_FILE = "int8_report.json"
+
+
+def quantize_ir(xml_path: str, bin_path: str, calibration_rows: np.ndarray, output_xml: str,
+                subset_size: int = 300):
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(model=xml_path, weights=bin_path)
+    dataset = nncf.Dataset([calibration_rows[i:i + 1] for i in range(len(calibration_rows))])
+    quantized = nncf.quantize(model, dataset, subset_size=min(subset_size, len(calibration_rows)))
+    ov.save_model(quantized, output_xml, compress_to_fp16=False)
+
+
+def _predict(compiled_model, X: np.ndarray) -> np.ndarray:
+    request = compiled_model.create_infer_request()
+    # One row at a time works for IRs exported with a fixed batch of 1 too
+    return np.concatenate([request.infer({0: X[i:i + 1]})[0] for i in range(len(X))])
+
+
+def measure_latency(xml_path: str, bin_path: str, X: np.ndarray, repeats: int = 200) -> dict:
+    """Single-row latency percentiles and one (len(X), features) batch, in ms"""
+    compiled_model = compile_openvino_model(xml_path, bin_path, X.shape[1],
+                                            config={"PERFORMANCE_HINT": "LATENCY"}, cache_dir="")
+    request = compiled_model.create_infer_request()
+    row = X[:1]
+    for _ in range(20):
+        request.infer({0: row})
+    single = []
+    for i in range(repeats):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        request.infer({0: row})
+        single.append((time.perf_counter() - start) * 1000)
+    batched = []
+    for _ in range(20):
+        start = time.perf_counter()
+        request.infer({0: X})
+        batched.append((time.perf_counter() - start) * 1000)
+    return {
+        "single_row_p50": round(float(np.percentile(single, 50)), 4),
+        "single_row_p95": round(float(np.percentile(single, 95)), 4),
+        "batch_rows": len(X),
+        "batch_p50": round(float(np.percentile(batched, 50)), 4),
+    }
+
+
+def compare_variants(model_dir: str, X: np.ndarray, y_true, classes) -> dict:
+    """Agreement, per-class metrics and latency of the INT8 IR against the original"""
+    from sklearn.metrics import classification_report
+
+    variants = {"fp": (XML_FILE, BIN_FILE), "int8": (INT8_XML_FILE, INT8_BIN_FILE)}
+    predictions, reports, latency = {}, {}, {}
+    labels = list(range(len(classes)))
+    for name, (xml_file, bin_file) in variants.items():
+        xml_path, bin_path = os.path.join(model_dir, xml_file), os.path.join(model_dir, bin_file)
+        compiled_model = compile_openvino_model(xml_path, bin_path, config={}, cache_dir="")
+        predictions[name] = _predict(compiled_model, X).argmax(axis=1)
+        reports[name] = classification_report(y_true, predictions[name], labels=labels,
+                                              target_names=[str(c) for c in classes],
+                                              output_dict=True, zero_division=0)
+        latency[name] = measure_latency(xml_path, bin_path, X)
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "eval_rows": len(X),
+        "top1_agreement": float((predictions["fp"] == predictions["int8"]).mean()),
+        "accuracy": {name: report["accuracy"] for name, report in reports.items()},
+        "per_class": reports,
+        "latency_ms": latency,
+        # Ties the report to the exact files it measured
+        "files": {name: file_sha256(os.path.join(model_dir, name))
+                  for name in (XML_FILE, BIN_FILE, INT8_XML_FILE, INT8_BIN_FILE)},
+    }
+
+
+def quantize_version(model_dir: str, featurizer, classes, csv_path: str = SYMPTOM_CSV_PATH,
+                     subset_size: int = 300) -> dict:
+    """Write the INT8 IR and its report into ``model_dir``; returns the report"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    X = featurizer.transform([row["symptoms"] for row in rows])
+    class_index = {str(c): i for i, c in enumerate(classes)}
+    y_true = [class_index.get(row["disease"], -1) for row in rows]
+
+    quantize_ir(os.path.join(model_dir, XML_FILE), os.path.join(model_dir, BIN_FILE), X,
+                os.path.join(model_dir, INT8_XML_FILE), subset_size)
+    report = compare_variants(model_dir, X, y_true, classes)
+    with open(os.path.join(model_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def int8_variant(model_dir: str, min_agreement: float):
+    """(xml, bin) of the INT8 IR if its report is current and passes, else (None, reason)"""
+    try:
+        with open(os.path.join(model_dir, REPORT_FILE), encoding='utf-8') as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        return None, "no INT8 report"
+    for name, expected in report.get("files", {}).items():
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path) or file_sha256(path) != expected:
+            return None, f"INT8 report is stale ({name} changed)"
+    if report["top1_agreement"] < min_agreement:
+        return None, f"INT8 agreement {report['top1_agreement']:.4f} < {min_agreement}"
+    return (os.path.join(model_dir, INT8_XML_FILE), os.path.join(model_dir, INT8_BIN_FILE)), None
+
+
+def summarize(report: dict) -> str:
+    fp, int8 = report["latency_ms"]["fp"], report["latency_ms"]["int8"]
+    return (f"top-1 agreement {report['top1_agreement']:.4f} on {report['eval_rows']} rows, "
+            f"accuracy fp {report['accuracy']['fp']:.4f} / int8 {report['accuracy']['int8']:.4f}, "
+            f"single-row p50 {fp['single_row_p50']} / {int8['single_row_p50']} ms, "
+            f"batch of {fp['batch_rows']} p50 {fp['batch_p50']} / {int8['batch_p50']} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize a model version to INT8 and report on it")
+    parser.add_argument("model_dir", help="model version directory, e.g. backend/models/v2")
+    parser.add_argument("--csv", default=SYMPTOM_CSV_PATH, help="calibration/evaluation CSV")
+    parser.add_argument("--subset-size", type=int, default=300, help="calibration rows")
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+
+    bundle = ModelBundle.from_dir(args.model_dir)
+    report = quantize_version(args.model_dir, bundle.featurizer(), bundle.classes, args.csv, args.subset_size)
+    print(f"✅ INT8 model written to: {os.path.join(args.model_dir, INT8_XML_FILE)}")
+    print(summarize(report))
+    passed = report["top1_agreement"] >= args.min_agreement
+    print("Agreement threshold passed" if passed else f"[WARNING] Agreement below {args.min_agreement}")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,83 @@
+# backend/schemas.py
+"""Request/response models, shared by the API and the bulk importer"""
+from pydantic import BaseModel, validator
+from typing import List, Optional
+
+
+class PatientCreate(BaseModel):
+    aadhaar: str
+    name: str
+    age: int
+    gender: str
+
+    @validator('aadhaar')
+    def validate_aadhaar(cls, v):
+        if not v or len(v) != 12:
+            raise ValueError('Aadhaar must be exactly 12 digits')
+        if not v.isdigit():
+            raise ValueError('Aadhaar must contain only digits')
+        return v
+
+    @validator('name')
+    def validate_name(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Name cannot be empty')
+        return v.strip()
+
+    @validator('age')
+    def validate_age(cls, v):
+        if v < 1 or v > 120:
+            raise ValueError('Age must be between 1 and 120')
+        return v
+
+    @validator('gender')
+    def validate_gender(cls, v):
+        if v not in ['Male', 'Female', 'Other']:
+            raise ValueError('Gender must be Male, Female, or Other')
+        return v
+
+class VitalsCreate(BaseModel):
+    patient_id: int
+    height: float
+    weight: float
+    bp: str
+    pulse: int
+
+def check_vitals(vitals: VitalsCreate):
+    """Raises ValueError for readings /vitals rejects with a 400"""
+    if vitals.height <= 0 or vitals.weight <= 0:
+        raise ValueError("Height and weight must be positive values")
+    if vitals.pulse <= 0:
+        raise ValueError("Pulse must be a positive value")
+
+class DiagnosisCreate(BaseModel):
+    """A recorded diagnosis, as stored by /diagnose"""
+    patient_id: int
+    symptoms: str
+    result: str
+    model_version: Optional[str] = None
+
+    @validator('symptoms', 'result')
+    def validate_not_empty(cls, v):
+        if not v or not v.strip():
+            raise ValueError('Cannot be empty')
+        return v.strip()
+
+class SymptomInput(BaseModel):
+    user_input: str
+    patient_id: int
+
+class DiagnosisResponse(BaseModel):
+    diagnosis: str
+    extracted_symptoms: List[str]
+    user_input: str
+    patient_id: int
+    diagnosis_id: int
+    model_version: Optional[str] = None
+
+class LoginResponse(BaseModel):
+    patient_id: int
+    name: str
+    age: int
+    gender: str
+    message: str
@@ -0,0 +1,102 @@
+# backend/settings.py
+import os
+import sys
+
+# Runtime tuning knobs, overridable through environment variables
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        # stderr: read at import, before a CLI could keep stdout clean
+        print(f"[WARNING] Invalid value for {name}, using default {default}", file=sys.stderr)
+        return default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.getenv(name, default).strip()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        print(f"[WARNING] Invalid value for {name}, using default {default}", file=sys.stderr)
+        return default
+
+
+# ------------------ DATABASE ------------------
+# SQLite storage profile: "performance" (WAL, synchronous=NORMAL, mmap),
+# "durable" (WAL, synchronous=FULL) or "default" (SQLite's own settings)
+DB_PROFILE = _env_str("KIOSK_DB_PROFILE", "performance").lower()
+# Sync endpoints run on AnyIO's 40-thread pool and hold one connection each,
+# so pool + overflow covers every thread without waiting on the pool
+DB_POOL_SIZE = _env_int("KIOSK_DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("KIOSK_DB_MAX_OVERFLOW", 30)
+DB_POOL_TIMEOUT_S = _env_float("KIOSK_DB_POOL_TIMEOUT_S", 30.0)
+# Async endpoints share the event loop; each aiosqlite connection is a thread
+# competing for the GIL, so a couple of connections outperform a large pool
+DB_ASYNC_POOL_SIZE = _env_int("KIOSK_DB_ASYNC_POOL_SIZE", 2)
+# Group commit of /vitals and /diagnose inserts (0 rows disables it): one
+# transaction per batch of up to this many inserts or this many ms, and how
+# many inserts may queue before callers wait for room
+WRITE_BEHIND_MAX_BATCH_SIZE = _env_int("KIOSK_WRITE_BEHIND_MAX_BATCH_SIZE", 0)
+WRITE_BEHIND_MAX_WAIT_MS = _env_float("KIOSK_WRITE_BEHIND_MAX_WAIT_MS", 5.0)
+WRITE_BEHIND_MAX_PENDING = _env_int("KIOSK_WRITE_BEHIND_MAX_PENDING", 1024)
+# Records per /ehr section: default page and the largest page a client may ask for
+EHR_PAGE_SIZE = _env_int("KIOSK_EHR_PAGE_SIZE", 50)
+EHR_MAX_PAGE_SIZE = _env_int("KIOSK_EHR_MAX_PAGE_SIZE", 500)
+# Rows per transaction of a bulk import, and where /bulk/import writes rejected rows
+BULK_IMPORT_CHUNK_SIZE = _env_int("KIOSK_BULK_IMPORT_CHUNK_SIZE", 1000)
+BULK_IMPORT_REJECTS_DIR = _env_str("KIOSK_BULK_IMPORT_REJECTS_DIR",
+                                   os.path.join(os.path.dirname(__file__), "database", "rejects"))
+# Rows a bulk export fetches from SQLite per batch
+BULK_EXPORT_YIELD_PER = _env_int("KIOSK_BULK_EXPORT_YIELD_PER", 1000)
+
+# ------------------ SYMPTOM EXTRACTION ------------------
+# rapidfuzz cdist worker threads for the fuzzy stage (-1 uses all cores)
+FUZZY_WORKERS = _env_int("KIOSK_FUZZY_WORKERS", 1)
+# Bounded LRU caches: token -> fuzzy match, normalized input -> symptoms
+SYMPTOM_TOKEN_CACHE_SIZE = _env_int("KIOSK_SYMPTOM_TOKEN_CACHE_SIZE", 4096)
+SYMPTOM_INPUT_CACHE_SIZE = _env_int("KIOSK_SYMPTOM_INPUT_CACHE_SIZE", 1024)
+
+# Worker processes for /diagnose extraction + prediction (0 extracts on the
+# threadpool and awaits the prediction in-process) and how many diagnoses may be pending before new ones get a 503
+DIAGNOSE_WORKERS = _env_int("KIOSK_DIAGNOSE_WORKERS", 0)
+DIAGNOSE_MAX_PENDING = _env_int("KIOSK_DIAGNOSE_MAX_PENDING", 64)
+
+# ------------------ SYMPTOM INFERENCE ------------------
+# Model engine: "openvino", "onnxruntime" or "numpy"
+INFERENCE_BACKEND = _env_str("KIOSK_INFERENCE_BACKEND", "openvino")
+# Dynamic micro-batching of concurrent /diagnose requests (0 rows disables it)
+INFERENCE_BATCH_MAX_SIZE = _env_int("KIOSK_INFERENCE_BATCH_MAX_SIZE", 32)
+INFERENCE_BATCH_MAX_WAIT_MS = _env_float("KIOSK_INFERENCE_BATCH_MAX_WAIT_MS", 2.0)
+# Symptom set -> diagnosis cache (0 entries disables it, 0 s TTL never expires)
+# and how many of the most frequent past symptom sets to pre-warm it with
+PREDICTION_CACHE_SIZE = _env_int("KIOSK_PREDICTION_CACHE_SIZE", 2048)
+PREDICTION_CACHE_TTL_S = _env_float("KIOSK_PREDICTION_CACHE_TTL_S", 3600.0)
+PREDICTION_CACHE_PREWARM = _env_int("KIOSK_PREDICTION_CACHE_PREWARM", 100)
+# Most complaints accepted by one /predict/batch request
+PREDICT_BATCH_MAX_ITEMS = _env_int("KIOSK_PREDICT_BATCH_MAX_ITEMS", 1000)
+
+# "int8" serves a version's quantized IR (openvino backend only) when its
+# int8_report.json shows at least this top-1 agreement with the original
+MODEL_VARIANT = _env_str("KIOSK_MODEL_VARIANT", "fp").lower()
+INT8_MIN_AGREEMENT = _env_float("KIOSK_INT8_MIN_AGREEMENT", 0.99)
+# Seconds between checks of models/ACTIVE for a new model version (0 disables)
+MODEL_WATCH_INTERVAL_S = _env_float("KIOSK_MODEL_WATCH_INTERVAL_S", 10.0)
+# Token for the /admin endpoints, sent as X-Admin-Token ("" disables them)
+ADMIN_TOKEN = _env_str("KIOSK_ADMIN_TOKEN", "")
+
+# OpenVINO compile profile: "latency" or "throughput" performance hint
+OPENVINO_PROFILE = _env_str("KIOSK_OPENVINO_PROFILE", "latency")
+# Profile overrides: CPU streams (a number or "AUTO"), inference threads and
+# precision ("bf16" or "fp32"); empty / 0 keeps the profile's choice
+OPENVINO_NUM_STREAMS = _env_str("KIOSK_OPENVINO_NUM_STREAMS", "")
+OPENVINO_NUM_THREADS = _env_int("KIOSK_OPENVINO_NUM_THREADS", 0)
+OPENVINO_PRECISION = _env_str("KIOSK_OPENVINO_PRECISION", "")
+# Compiled-model cache so restarts and new workers skip recompilation ("" disables)
+OPENVINO_CACHE_DIR = _env_str("KIOSK_OPENVINO_CACHE_DIR", os.path.join(os.path.dirname(__file__), "models", "ov_cache"))
+# Infer request pool size (0 uses the device's optimal count for the streams)
+OPENVINO_INFER_REQUESTS = _env_int("KIOSK_OPENVINO_INFER_REQUESTS", 0)
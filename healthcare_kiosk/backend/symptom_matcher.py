@@ -0,0 +1,237 @@
+# backend/symptom_matcher.py
+from bisect import bisect_left
+from collections import Counter, deque
+import hashlib
+import numpy as np
+from rapidfuzz import process, fuzz
+
+# Sorts after every real character, used as the upper bound of a prefix range
+_MAX_CHAR = "\U0010ffff"
+
+
+class SymptomMatcher:
+    """Symptom vocabulary compiled once for repeated extraction.
+
+    Three structures replace the per-request scans over the whole vocabulary:
+
+    * an Aho-Corasick automaton over the symptom strings, which reports every
+      symptom occurring anywhere in the text in a single pass,
+    * a sorted table of symptom suffixes, which answers "which symptoms contain
+      this phrase" with a binary search instead of a vocabulary loop, and
+    * length and character-bigram indexes that rule out fuzzy pairs which
+      cannot reach the score cutoff before anything is scored.
+
+    Synonyms are matched like any other symptom string but resolve to the id
+    of their canonical symptom.
+    """
+
+    def __init__(self, symptoms, synonyms=None):
+        synonyms = {alias: canonical for alias, canonical in (synonyms or {}).items()
+                    if alias and canonical and alias != canonical}
+        # Sorted so symptom ids are stable for a given vocabulary
+        self.symptoms = sorted({s for s in symptoms if s} | set(synonyms.values()))
+        self.symptom_ids = {s: i for i, s in enumerate(self.symptoms)}
+        self.synonyms = synonyms
+        # Every matchable string and the canonical symptom id it resolves to
+        self.patterns = sorted(set(self.symptoms) | set(synonyms))
+        self._pattern_symptom = [self.symptom_ids[synonyms.get(p, p)] for p in self.patterns]
+        # Identifies the vocabulary, e.g. to invalidate caches built on it
+        digest = hashlib.sha1("\n".join(self.symptoms).encode())
+        digest.update("\n".join(f"{a}={synonyms[a]}" for a in sorted(synonyms)).encode())
+        self.fingerprint = digest.hexdigest()[:16]
+        self._build_automaton()
+        self._build_suffix_table()
+        self._build_fuzzy_index()
+
+    def __len__(self):
+        return len(self.symptoms)
+
+    # ------------------ BUILD ------------------
+    def _build_automaton(self):
+        goto = [{}]
+        outputs = [[]]
+
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(self._pattern_symptom[pid])
+
+        # Breadth-first pass to compute failure links and merge outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                if state:
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                outputs[nxt].extend(outputs[fail[nxt]])
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(o) for o in outputs]
+
+    def _build_suffix_table(self):
+        entries = sorted(
+            (pattern[i:], self._pattern_symptom[pid])
+            for pid, pattern in enumerate(self.patterns)
+            for i in range(len(pattern))
+        )
+        self._suffixes = [suffix for suffix, _ in entries]
+        self._suffix_ids = [sid for _, sid in entries]
+
+    def _build_fuzzy_index(self):
+        postings = {}
+        for pid, pattern in enumerate(self.patterns):
+            for gram, count in _bigrams(pattern).items():
+                ids, counts = postings.setdefault(gram, ([], []))
+                ids.append(pid)
+                counts.append(count)
+        self._index_fuzzy_postings(postings)
+
+    def _index_fuzzy_postings(self, postings):
+        self._lengths = np.array([len(p) for p in self.patterns], dtype=np.int32)
+        self._bigram_postings = {
+            gram: (np.array(ids, dtype=np.int32), np.array(counts, dtype=np.int32))
+            for gram, (ids, counts) in postings.items()
+        }
+
+    # ------------------ SERIALIZATION ------------------
+    def to_state(self) -> dict:
+        """Prebuilt structures as plain Python objects, for the vocabulary artifact"""
+        return {
+            "symptoms": self.symptoms,
+            "synonyms": self.synonyms,
+            "patterns": self.patterns,
+            "pattern_symptom": self._pattern_symptom,
+            "fingerprint": self.fingerprint,
+            "goto": self._goto,
+            "fail": self._fail,
+            "outputs": self._outputs,
+            "suffixes": self._suffixes,
+            "suffix_ids": self._suffix_ids,
+            "bigram_postings": {
+                gram: (ids.tolist(), counts.tolist())
+                for gram, (ids, counts) in self._bigram_postings.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "SymptomMatcher":
+        """Rebuild a matcher from ``to_state`` output without recompiling it"""
+        matcher = cls.__new__(cls)
+        matcher.symptoms = state["symptoms"]
+        matcher.symptom_ids = {s: i for i, s in enumerate(matcher.symptoms)}
+        matcher.synonyms = state["synonyms"]
+        matcher.patterns = state["patterns"]
+        matcher._pattern_symptom = state["pattern_symptom"]
+        matcher.fingerprint = state["fingerprint"]
+        matcher._goto = state["goto"]
+        matcher._fail = state["fail"]
+        matcher._outputs = state["outputs"]
+        matcher._suffixes = state["suffixes"]
+        matcher._suffix_ids = state["suffix_ids"]
+        matcher._index_fuzzy_postings(state["bigram_postings"])
+        return matcher
+
+    # ------------------ LOOKUPS ------------------
+    def find_in_text(self, text: str) -> set:
+        """Ids of all symptoms that occur as a substring of ``text``"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+    def find_containing(self, phrase: str) -> set:
+        """Ids of all symptoms that contain ``phrase`` as a substring"""
+        lo = bisect_left(self._suffixes, phrase)
+        hi = bisect_left(self._suffixes, phrase + _MAX_CHAR, lo)
+        return set(self._suffix_ids[lo:hi])
+
+    def match(self, text: str) -> set:
+        """Direct and phrase matches for already normalized text.
+
+        Equivalent to testing ``symptom in text`` for every symptom, plus
+        ``phrase in symptom`` for every 1-3 word phrase longer than three
+        characters.
+        """
+        found = self.find_in_text(text)
+        words = text.split()
+        for i in range(len(words)):
+            for j in range(i + 1, min(i + 4, len(words) + 1)):
+                phrase = ' '.join(words[i:j])
+                # Exact phrase matches are already covered by find_in_text
+                if len(phrase) > 3:
+                    found |= self.find_containing(phrase)
+        return found
+
+    def fuzzy_candidates(self, word: str, score_cutoff: float = 85) -> np.ndarray:
+        """Boolean mask of patterns that could score ``score_cutoff`` against ``word``.
+
+        fuzz.ratio is ``100 * (1 - d / (len(a) + len(b)))`` with ``d`` the
+        indel distance, which bounds ``d`` for a given cutoff. A pair is dropped
+        when the length difference alone exceeds that bound, or when the two
+        strings share fewer bigrams than the q-gram lemma allows. Both tests
+        are exact upper bounds, so no pair reaching the cutoff is ever dropped.
+        """
+        n = len(word)
+        max_dist = np.floor((100 - score_cutoff) * (n + self._lengths) / 100 + 1e-9).astype(np.int32)
+        mask = np.abs(self._lengths - n) <= max_dist
+
+        common = np.zeros(len(self.patterns), dtype=np.int32)
+        for gram, count in _bigrams(word).items():
+            posting = self._bigram_postings.get(gram)
+            if posting is not None:
+                ids, counts = posting
+                common[ids] += np.minimum(counts, count)
+        mask &= common >= np.maximum(self._lengths, n) - 1 - 2 * max_dist
+        return mask
+
+    def fuzzy_match(self, words, score_cutoff: float = 85, workers: int = 1) -> dict:
+        """Best fuzz.ratio symptom id for each word, or None below ``score_cutoff``.
+
+        All words are scored in one ``process.cdist`` call against the union of
+        their prefiltered candidates. Ties go to the first pattern in sort order.
+        """
+        words = list(dict.fromkeys(words))
+        result = dict.fromkeys(words)
+        if not words or not self.patterns:
+            return result
+
+        allowed = np.stack([self.fuzzy_candidates(w, score_cutoff) for w in words])
+        columns = np.flatnonzero(allowed.any(axis=0))
+        if columns.size == 0:
+            return result
+
+        choices = [self.patterns[i] for i in columns]
+        scores = process.cdist(words, choices, scorer=fuzz.ratio,
+                               score_cutoff=score_cutoff, workers=workers)
+        scores[~allowed[:, columns]] = 0
+        best = scores.argmax(axis=1)
+        for row, word in enumerate(words):
+            if scores[row, best[row]] >= score_cutoff:
+                result[word] = self._pattern_symptom[columns[best[row]]]
+        return result
+
+    def names(self, ids) -> list:
+        return [self.symptoms[i] for i in ids]
+
+
+def _bigrams(text: str) -> Counter:
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
@@ -0,0 +1,133 @@
+# backend/symptom_vocab.py
+"""Symptom vocabulary and its precompiled artifact.
+
+Build the artifact after changing symptoms_disease.csv, KNOWN_SYMPTOMS or
+SYMPTOM_SYNONYMS:
+
+    python -m backend.symptom_vocab
+"""
+import argparse
+import csv
+import hashlib
+import os
+import pickle
+from .symptom_matcher import SymptomMatcher
+
+BACKEND_DIR = os.path.dirname(__file__)
+SYMPTOM_CSV_PATH = os.path.join(os.path.dirname(BACKEND_DIR), "symptoms_disease.csv")
+VOCAB_ARTIFACT_PATH = os.path.join(BACKEND_DIR, "models", "symptom_vocab.bin")
+
+# Bump when the artifact layout or SymptomMatcher state changes
+VOCAB_FORMAT_VERSION = 1
+_MAGIC = b"KIOSKVOC"
+
+# Expanded symptom list on top of the CSV vocabulary
+KNOWN_SYMPTOMS = [
+    "fever", "cough", "headache", "sore throat", "shortness of breath", "chest pain",
+    "fatigue", "vomiting", "diarrhea", "rash", "body pain", "joint pain", "dizziness",
+    "nausea", "runny nose", "loss of taste", "loss of smell", "blurred vision", "weakness",
+    "cold", "anxiety", "depression", "palpitations", "itching", "burning sensation",
+    "stomach pain", "back pain", "muscle pain", "swelling", "constipation", "insomnia",
+    "sweating", "chills", "difficulty swallowing", "hoarseness", "ear pain", "sneezing",
+    "dry cough", "breathlessness", "arm pain", "nasal congestion", "watery eyes",
+    "itchy eyes", "sensitivity to light", "aura", "wheezing", "chest tightness",
+    "pale skin", "restlessness", "panic", "phlegm", "chest discomfort", "weight gain",
+    "cold intolerance", "dry skin", "heat intolerance", "tremors", "weight loss",
+    "postnasal drip", "facial pain", "pressure", "burning urination", "cloudy urine",
+    "frequent urination", "neck stiffness", "confusion", "high fever", "thirst"
+]
+
+# Colloquial phrasings patients use -> canonical symptom
+SYMPTOM_SYNONYMS = {
+    "throwing up": "vomiting",
+    "loose motions": "diarrhea",
+    "loose motion": "diarrhea",
+    "stomach ache": "stomach pain",
+    "short of breath": "shortness of breath",
+    "stuffy nose": "nasal congestion",
+    "blocked nose": "nasal congestion",
+    "tiredness": "fatigue",
+}
+
+
+def normalize_symptom(symptom: str) -> str:
+    return symptom.strip().lower().replace('_', ' ')
+
+
+def read_csv_symptoms(csv_path: str = SYMPTOM_CSV_PATH) -> list:
+    """Symptoms from the training CSV, where each row is space-separated ``_``-joined terms"""
+    symptom_set = set()
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for sym in (row.get('symptoms') or '').split():
+                clean_sym = normalize_symptom(sym)
+                if clean_sym:
+                    symptom_set.add(clean_sym)
+    return sorted(symptom_set)
+
+
+def source_hash(csv_path: str = SYMPTOM_CSV_PATH) -> str:
+    """Hash of every input the artifact is compiled from"""
+    digest = hashlib.sha256(str(VOCAB_FORMAT_VERSION).encode())
+    if os.path.exists(csv_path):
+        with open(csv_path, 'rb') as f:
+            digest.update(f.read())
+    digest.update("\n".join(KNOWN_SYMPTOMS).encode())
+    digest.update("\n".join(f"{a}={c}" for a, c in sorted(SYMPTOM_SYNONYMS.items())).encode())
+    return digest.hexdigest()
+
+
+def compile_vocabulary(csv_path: str = SYMPTOM_CSV_PATH) -> SymptomMatcher:
+    symptoms = [normalize_symptom(s) for s in KNOWN_SYMPTOMS]
+    if os.path.exists(csv_path):
+        symptoms += read_csv_symptoms(csv_path)
+    else:
+        print(f"[WARNING] {csv_path} not found, using built-in symptoms only")
+    synonyms = {normalize_symptom(a): normalize_symptom(c) for a, c in SYMPTOM_SYNONYMS.items()}
+    return SymptomMatcher(symptoms, synonyms)
+
+
+def save_vocabulary(matcher: SymptomMatcher, path: str = VOCAB_ARTIFACT_PATH,
+                    csv_path: str = SYMPTOM_CSV_PATH):
+    payload = {
+        "format_version": VOCAB_FORMAT_VERSION,
+        "source_hash": source_hash(csv_path),
+        "matcher": matcher.to_state(),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_MAGIC)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_vocabulary(path: str = VOCAB_ARTIFACT_PATH, csv_path: str = SYMPTOM_CSV_PATH) -> SymptomMatcher:
+    """Load the compiled vocabulary, recompiling from source if the artifact is missing or stale"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("not a symptom vocabulary artifact")
+            payload = pickle.load(f)
+        if payload.get("format_version") != VOCAB_FORMAT_VERSION:
+            raise ValueError(f"format version {payload.get('format_version')} != {VOCAB_FORMAT_VERSION}")
+        # Deployments may ship the artifact without the CSV it was built from
+        if os.path.exists(csv_path) and payload.get("source_hash") != source_hash(csv_path):
+            raise ValueError("artifact is older than its sources")
+        matcher = SymptomMatcher.from_state(payload["matcher"])
+        print(f"[INFO] Loaded {len(matcher)} symptoms from {path}")
+        return matcher
+    except Exception as e:
+        print(f"[WARNING] Symptom vocabulary artifact unusable ({e}); compiling from {csv_path}")
+        return compile_vocabulary(csv_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the symptom vocabulary artifact")
+    parser.add_argument("--csv", default=SYMPTOM_CSV_PATH, help="symptoms/disease training CSV")
+    parser.add_argument("--output", default=VOCAB_ARTIFACT_PATH, help="artifact path")
+    args = parser.parse_args()
+
+    matcher = compile_vocabulary(args.csv)
+    save_vocabulary(matcher, args.output, args.csv)
+    print(f"✅ {len(matcher)} symptoms, {len(matcher.synonyms)} synonyms ({matcher.fingerprint}) written to: {args.output}")
@@ -1,90 +1,100 @@
-import os
-import pandas as pd
-from rapidfuzz import process, fuzz
 import re
+from threading import Lock
+from typing import NamedTuple
+from .cache import LRUCache, MISSING
+from .settings import FUZZY_WORKERS, SYMPTOM_TOKEN_CACHE_SIZE, SYMPTOM_INPUT_CACHE_SIZE
+from .symptom_matcher import SymptomMatcher
+from .symptom_vocab import KNOWN_SYMPTOMS, load_vocabulary  # KNOWN_SYMPTOMS kept for existing imports
 
-# Load symptom list from CSV
-BASE_DIR = os.path.dirname(__file__)
-SYMPTOM_CSV_PATH = os.path.join(BASE_DIR, "healthcare_kiosk", "symptoms_disease.csv")
+# Compiled vocabulary, loaded from the prebuilt artifact on first use
+_matcher = None
+_matcher_lock = Lock()
 
-# Load all symptoms into memory
-ALL_SYMPTOMS = []
-try:
-    if os.path.exists(SYMPTOM_CSV_PATH):
-        df = pd.read_csv(SYMPTOM_CSV_PATH)
-        symptom_set = set()
-        for symptoms in df['symptoms']:
-            if pd.notna(symptoms):  # Check for NaN values
-                for sym in str(symptoms).split('|'):
-                    clean_sym = sym.strip().lower().replace('_', ' ')
-                    if clean_sym:
-                        symptom_set.add(clean_sym)
-        ALL_SYMPTOMS = list(symptom_set)
-        print(f"[INFO] Loaded {len(ALL_SYMPTOMS)} symptoms from CSV")
-    else:
-        print(f"[WARNING] {SYMPTOM_CSV_PATH} not found")
-except Exception as e:
-    print(f"[ERROR] Failed to load symptoms from CSV: {e}")
+def get_symptom_matcher() -> SymptomMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = load_vocabulary()
+    return _matcher
 
-# Expanded symptom list as fallback
-KNOWN_SYMPTOMS = [
-    "fever", "cough", "headache", "sore throat", "shortness of breath", "chest pain",
-    "fatigue", "vomiting", "diarrhea", "rash", "body pain", "joint pain", "dizziness",
-    "nausea", "runny nose", "loss of taste", "loss of smell", "blurred vision", "weakness",
-    "cold", "anxiety", "depression", "palpitations", "itching", "burning sensation",
-    "stomach pain", "back pain", "muscle pain", "swelling", "constipation", "insomnia",
-    "sweating", "chills", "difficulty swallowing", "hoarseness", "ear pain", "sneezing",
-    "dry cough", "breathlessness", "arm pain", "nasal congestion", "watery eyes",
-    "itchy eyes", "sensitivity to light", "aura", "wheezing", "chest tightness",
-    "pale skin", "restlessness", "panic", "phlegm", "chest discomfort", "weight gain",
-    "cold intolerance", "dry skin", "heat intolerance", "tremors", "weight loss",
-    "postnasal drip", "facial pain", "pressure", "burning urination", "cloudy urine",
-    "frequent urination", "neck stiffness", "confusion", "high fever", "thirst"
-]
+# Process-wide caches, keyed by vocabulary fingerprint so stale entries are never served
+TOKEN_CACHE = LRUCache(SYMPTOM_TOKEN_CACHE_SIZE, name="symptom_tokens")
+INPUT_CACHE = LRUCache(SYMPTOM_INPUT_CACHE_SIZE, name="symptom_inputs")
 
-# Combine all symptoms
-ALL_SYMPTOMS_COMBINED = list(set(ALL_SYMPTOMS + KNOWN_SYMPTOMS))
+def set_symptom_vocabulary(matcher: SymptomMatcher):
+    """Replace the symptom vocabulary and drop everything cached against the old one"""
+    global _matcher
+    with _matcher_lock:
+        _matcher = matcher
+    TOKEN_CACHE.clear()
+    INPUT_CACHE.clear()
+    print(f"[INFO] Symptom vocabulary set: {len(matcher)} symptoms ({matcher.fingerprint})")
 
-def extract_symptom_keywords(text: str):
-    """Extract symptoms from user input text"""
-    if not text:
-        return []
-    
+def cache_stats():
+    return {"tokens": TOKEN_CACHE.stats(), "inputs": INPUT_CACHE.stats()}
+
+def normalize_text(text: str) -> str:
+    """Lowercase and remove punctuation and extra spaces"""
     text = text.lower().strip()
-    extracted = set()
-    
-    # Clean text - remove punctuation and extra spaces
     text = re.sub(r'[^\w\s]', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
+    return re.sub(r'\s+', ' ', text)
+
+def _fuzzy_symptom_ids(matcher, words):
+    """Resolve words to fuzzy symptom ids, scoring only the uncached ones"""
+    resolved = {}
+    pending = []
+    for word in dict.fromkeys(words):
+        sid = TOKEN_CACHE.get((matcher.fingerprint, word))
+        if sid is MISSING:
+            pending.append(word)
+        else:
+            resolved[word] = sid
     
-    # Direct keyword matching
-    for symptom in ALL_SYMPTOMS_COMBINED:
-        if symptom in text:
-            extracted.add(symptom)
+    if pending:
+        matches = matcher.fuzzy_match(pending, score_cutoff=85, workers=FUZZY_WORKERS)  # 85% similarity threshold
+        for word, sid in matches.items():
+            TOKEN_CACHE.put((matcher.fingerprint, word), sid)
+        resolved.update(matches)
     
-    # Phrase matching for multi-word symptoms
-    words = text.split()
-    for i in range(len(words)):
-        for j in range(i+1, min(i+4, len(words)+1)):  # Check up to 3-word phrases
-            phrase = ' '.join(words[i:j])
-            for symptom in ALL_SYMPTOMS_COMBINED:
-                if phrase == symptom or (len(phrase) > 3 and phrase in symptom):
-                    extracted.add(symptom)
+    return {sid for sid in resolved.values() if sid is not None}
+
+class ExtractedSymptoms(NamedTuple):
+    names: list
+    ids: tuple          # symptom ids in ``matcher``, ascending
+    matcher: SymptomMatcher
+
+def extract_symptoms_with_ids(text: str) -> ExtractedSymptoms:
+    """Extract symptoms from user input text, with their vocabulary ids"""
+    matcher = get_symptom_matcher()
+    if not text:
+        return ExtractedSymptoms([], (), matcher)
+    
+    text = normalize_text(text)
     
-    # Fuzzy matching for individual words
-    for word in words:
-        if len(word) > 3:  # Only match words longer than 3 characters
-            try:
-                match, score, _ = process.extractOne(word, ALL_SYMPTOMS_COMBINED, scorer=fuzz.ratio)
-                if score >= 85:  # 85% similarity threshold
-                    extracted.add(match)
-            except Exception as e:
-                print(f"[WARNING] Fuzzy matching error for '{word}': {e}")
+    ids = INPUT_CACHE.get((matcher.fingerprint, text))
+    if ids is MISSING:
+        # Direct keyword and multi-word phrase matching (up to 3-word phrases)
+        extracted = matcher.match(text)
+        
+        # Fuzzy matching for individual words
+        candidates = [word for word in text.split() if len(word) > 3]  # Only match words longer than 3 characters
+        try:
+            extracted |= _fuzzy_symptom_ids(matcher, candidates)
+        except Exception as e:
+            print(f"[WARNING] Fuzzy matching error for {candidates}: {e}")
+        
+        ids = tuple(sorted(extracted))
+        INPUT_CACHE.put((matcher.fingerprint, text), ids)
     
-    result = list(extracted)
-    print(f"[INFO] Extracted symptoms: {result}")
+    result = ExtractedSymptoms(matcher.names(ids), ids, matcher)
+    print(f"[INFO] Extracted symptoms: {result.names}")
     return result
 
+def extract_symptom_keywords(text: str):
+    """Extract symptoms from user input text"""
+    return extract_symptoms_with_ids(text).names
+
 def extract_symptoms(user_input: str, threshold: int = 85):
     """Alternative function for backward compatibility"""
     return extract_symptom_keywords(user_input)
@@ -1,40 +1,69 @@
+# backend/train_and_convert_model.py
+"""Train the symptom classifier and write a new model version.
+
+    python -m backend.train_and_convert_model --version v2 --activate
+
+Everything the backend loads is written into backend/models/<version>/ in
+one run:
+
+    symptom_model.kbundle   featurizer, MLP weights, labels and a manifest
+                            with the hashes of every file below
+    symptom_model.onnx      exported network (dynamic batch dimension)
+    symptom_model.xml/.bin  OpenVINO IR converted from the ONNX export
+
+With --int8 the run also writes symptom_model_int8.xml/.bin and
+int8_report.json (see backend/quantization.py).
+
+Sweep mode trains every combination of hidden sizes, feature type and
+vocabulary size in a process pool, measures held-out accuracy and the
+exported IR's CPU latency, and writes a Pareto table:
+
+    python -m backend.train_and_convert_model --sweep --sweep-hidden "64,32;32;16" \
+        --sweep-features tfidf,binary --sweep-max-features 0,40 --min-accuracy 0.95 --promote
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+from datetime import datetime, timezone
+import inspect
+import itertools
+import json
+import os
+import random
+import shutil
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 from sklearn.feature_extraction.text import TfidfVectorizer
 import pandas as pd
 import numpy as np
-import os
-import onnx
-import joblib
-
-# ✅ Corrected path to match your actual CSV file
-DATA_PATH = r"C:\Users\shriv\OneDrive\Desktop\intel project\healthcare_kiosk\backend\database\symptoms_disease.csv"
-MODEL_DIR = r"C:\Users\shriv\OneDrive\Desktop\intel project\healthcare_kiosk\backend\models"
-ONNX_MODEL_PATH = os.path.join(MODEL_DIR, "symptom_model.onnx")
+from .featurizer import SYMPTOM_CSV_PATH, TfidfFeaturizer
+from .model_bundle import BUNDLE_FILE, ModelBundle, file_sha256
+from .model_registry import MODELS_ROOT, set_active_version
+from .quantization import INT8_XML_FILE, INT8_BIN_FILE, REPORT_FILE, measure_latency, quantize_version, summarize
 
-# Ensure model directory exists
-os.makedirs(MODEL_DIR, exist_ok=True)
+ONNX_FILE = "symptom_model.onnx"
+XML_FILE = "symptom_model.xml"
+BIN_FILE = "symptom_model.bin"
+FEATURE_TYPES = ("tfidf", "binary")
 
-# Load dataset
-df = pd.read_csv(DATA_PATH)
+# ------------------ DATA ------------------
+def load_dataset(data_path: str):
+    df = pd.read_csv(data_path)
+    return df["symptoms"].tolist(), df["disease"].tolist()
 
-# Vectorize the 'symptoms' text column
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(df["symptoms"]).toarray().astype(np.float32)
+def make_vectorizer(features: str = "tfidf", max_features: int = None, min_df: int = 1) -> TfidfVectorizer:
+    """TF-IDF, or plain 0/1 term presence for ``features="binary"``; ``max_features`` prunes the vocabulary"""
+    if features not in FEATURE_TYPES:
+        raise ValueError(f"Unknown feature type '{features}', expected one of {FEATURE_TYPES}")
+    if features == "binary":
+        return TfidfVectorizer(binary=True, use_idf=False, norm=None, max_features=max_features, min_df=min_df)
+    return TfidfVectorizer(max_features=max_features, min_df=min_df)
 
-# Encode the labels
-le = LabelEncoder()
-y = le.fit_transform(df["disease"])
-
-# Split data
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Custom Dataset
 class SymptomDataset(Dataset):
     def __init__(self, features, labels):
         self.X = torch.tensor(features)
@@ -46,85 +75,334 @@ class SymptomDataset(Dataset):
     def __getitem__(self, idx):
         return self.X[idx], self.y[idx]
 
-train_ds = SymptomDataset(X_train, y_train)
-test_ds = SymptomDataset(X_test, y_test)
-
-train_loader = DataLoader(train_ds, batch_size=16, shuffle=True)
-test_loader = DataLoader(test_ds, batch_size=16)
-
-# Model definition
+# ------------------ MODEL ------------------
 class SymptomClassifier(nn.Module):
-    def __init__(self, input_dim, output_dim):
+    """Linear -> ReLU stack with dropout between hidden layers, then a linear output"""
+
+    def __init__(self, input_dim, output_dim, hidden_sizes=(64, 32), dropout=0.3):
         super(SymptomClassifier, self).__init__()
-        self.classifier = nn.Sequential(
-            nn.Linear(input_dim, 64),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(64, 32),
-            nn.ReLU(),
-            nn.Linear(32, output_dim)
-        )
+        layers = []
+        previous = input_dim
+        for i, size in enumerate(hidden_sizes):
+            layers += [nn.Linear(previous, size), nn.ReLU()]
+            if dropout and i < len(hidden_sizes) - 1:
+                layers.append(nn.Dropout(dropout))
+            previous = size
+        layers.append(nn.Linear(previous, output_dim))
+        self.classifier = nn.Sequential(*layers)
 
     def forward(self, x):
         return self.classifier(x)
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-input_size = X.shape[1]
-num_classes = len(np.unique(y))
-
-model = SymptomClassifier(input_size, num_classes).to(device)
-
-# Training setup
-criterion = nn.CrossEntropyLoss()
-optimizer = optim.Adam(model.parameters(), lr=0.001)
-epochs = 20
-
-# Train
-model.train()
-for epoch in range(epochs):
-    for inputs, labels in train_loader:
-        inputs, labels = inputs.to(device), labels.to(device)
-
-        optimizer.zero_grad()
-        outputs = model(inputs)
-        loss = criterion(outputs, labels)
-        loss.backward()
-        optimizer.step()
-
-# Evaluate
-model.eval()
-all_preds = []
-all_true = []
-
-with torch.no_grad():
-    for inputs, labels in test_loader:
-        inputs = inputs.to(device)
-        outputs = model(inputs)
-        _, preds = torch.max(outputs, 1)
-        all_preds.extend(preds.cpu().numpy())
-        all_true.extend(labels.numpy())
-
-print("\nClassification Report:\n")
-print(classification_report(all_true, all_preds, target_names=le.classes_))
-
-# Save ONNX
-dummy_input = torch.randn(1, input_size, device=device)
-torch.onnx.export(
-    model, dummy_input, ONNX_MODEL_PATH,
-    input_names=["input"],
-    output_names=["output"],
-    export_params=True,
-    opset_version=11
-)
-
-print(f"\n✅ ONNX model exported to: {ONNX_MODEL_PATH}")
-
-# Save Label Encoder and Vectorizer
-VECTORIZER_PATH = os.path.join(MODEL_DIR, "vectorizer.pkl")
-CLASSES_PATH = os.path.join(MODEL_DIR, "classes.pkl")
-
-joblib.dump(vectorizer, VECTORIZER_PATH)
-print(f"✅ Vectorizer saved to: {VECTORIZER_PATH}")
-
-joblib.dump(le.classes_, CLASSES_PATH)
-print(f"✅ Classes saved to: {CLASSES_PATH}")
+    def linear_layers(self) -> list:
+        """(weight (out, in), bias (out,)) of every Linear layer, as float32 arrays"""
+        return [(m.weight.detach().cpu().numpy().astype(np.float32),
+                 m.bias.detach().cpu().numpy().astype(np.float32))
+                for m in self.classifier if isinstance(m, nn.Linear)]
+
+def set_seed(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def train(model, loader, epochs: int, lr: float, device):
+    criterion = nn.CrossEntropyLoss()
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    model.train()
+    for epoch in range(epochs):
+        for inputs, labels in loader:
+            inputs, labels = inputs.to(device), labels.to(device)
+
+            optimizer.zero_grad()
+            outputs = model(inputs)
+            loss = criterion(outputs, labels)
+            loss.backward()
+            optimizer.step()
+
+def predict(model, loader, device):
+    model.eval()
+    all_preds = []
+    all_true = []
+    with torch.no_grad():
+        for inputs, labels in loader:
+            outputs = model(inputs.to(device))
+            _, preds = torch.max(outputs, 1)
+            all_preds.extend(preds.cpu().numpy())
+            all_true.extend(labels.numpy())
+    return all_true, all_preds
+
+# ------------------ EXPORT ------------------
+def export_onnx(model, input_size: int, onnx_path: str, opset: int = 11):
+    model.eval()
+    dummy_input = torch.randn(1, input_size, device=next(model.parameters()).device)
+    # Newer torch defaults to the dynamo exporter, which needs onnxscript
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    torch.onnx.export(
+        model, dummy_input, onnx_path,
+        input_names=["input"],
+        output_names=["output"],
+        dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+        export_params=True,
+        opset_version=opset,
+        **legacy
+    )
+
+def convert_to_ir(onnx_path: str, xml_path: str, compress_to_fp16: bool = True):
+    import openvino as ov
+    ov.save_model(ov.convert_model(onnx_path), xml_path, compress_to_fp16=compress_to_fp16)
+
+# ------------------ PIPELINE ------------------
+def train_model_version(data_path: str, output_dir: str, hidden_sizes=(64, 32), dropout: float = 0.3,
+                        epochs: int = 20, batch_size: int = 16, lr: float = 0.001,
+                        test_size: float = 0.2, seed: int = 42, opset: int = 11,
+                        compress_to_fp16: bool = True, int8: bool = False, features: str = "tfidf",
+                        max_features: int = None, min_df: int = 1, verbose: bool = True) -> dict:
+    """Train, evaluate and export one model into ``output_dir``; returns its manifest"""
+    set_seed(seed)
+    texts, diseases = load_dataset(data_path)
+
+    # Vectorize the 'symptoms' text column
+    vectorizer = make_vectorizer(features, max_features, min_df)
+    X = vectorizer.fit_transform(texts).toarray().astype(np.float32)
+
+    # Encode the labels
+    le = LabelEncoder()
+    y = le.fit_transform(diseases)
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    train_loader = DataLoader(SymptomDataset(X_train, y_train), batch_size=batch_size, shuffle=True)
+    test_loader = DataLoader(SymptomDataset(X_test, y_test), batch_size=batch_size)
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = SymptomClassifier(X.shape[1], len(le.classes_), hidden_sizes, dropout).to(device)
+    train(model, train_loader, epochs, lr, device)
+
+    all_true, all_preds = predict(model, test_loader, device)
+    accuracy = float(accuracy_score(all_true, all_preds))
+    if verbose:
+        print("\nClassification Report:\n")
+        print(classification_report(all_true, all_preds, labels=list(range(len(le.classes_))),
+                                    target_names=le.classes_, zero_division=0))
+
+    os.makedirs(output_dir, exist_ok=True)
+    onnx_path = os.path.join(output_dir, ONNX_FILE)
+    xml_path = os.path.join(output_dir, XML_FILE)
+    export_onnx(model, X.shape[1], onnx_path, opset)
+    convert_to_ir(onnx_path, xml_path, compress_to_fp16)
+
+    featurizer = TfidfFeaturizer.from_vectorizer(vectorizer)
+    files = [ONNX_FILE, XML_FILE, BIN_FILE]
+    int8_summary = None
+    if int8:
+        report = quantize_version(output_dir, featurizer, le.classes_, data_path)
+        files += [INT8_XML_FILE, INT8_BIN_FILE, REPORT_FILE]
+        int8_summary = {"top1_agreement": report["top1_agreement"], "accuracy": report["accuracy"]["int8"]}
+        if verbose:
+            print(f"INT8: {summarize(report)}")
+    bundle = ModelBundle(
+        featurizer.terms(),
+        le.classes_,
+        featurizer.settings(),
+        featurizer.idf,
+        model.linear_layers(),
+        manifest={
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source_csv_sha256": file_sha256(data_path),
+            "params": {
+                "hidden_sizes": list(hidden_sizes), "dropout": dropout, "epochs": epochs,
+                "batch_size": batch_size, "lr": lr, "test_size": test_size, "seed": seed,
+                "opset": opset, "compress_to_fp16": compress_to_fp16,
+                "features": features, "max_features": max_features, "min_df": min_df,
+            },
+            "metrics": {"test_accuracy": accuracy, "test_rows": len(y_test), "n_features": X.shape[1],
+                        "int8": int8_summary},
+            "files": {name: file_sha256(os.path.join(output_dir, name)) for name in files},
+            "versions": {"torch": torch.__version__, "numpy": np.__version__},
+        },
+    )
+    bundle.save(os.path.join(output_dir, BUNDLE_FILE))
+    return bundle.manifest
+
+# ------------------ SWEEP ------------------
+def sweep_grid(hidden_options, feature_options, max_feature_options) -> dict:
+    """Candidate name -> train_model_version keyword arguments"""
+    grid = {}
+    for hidden_sizes, features, max_features in itertools.product(hidden_options, feature_options,
+                                                                    max_feature_options):
+        name = f"h{'-'.join(map(str, hidden_sizes))}_{features}_v{max_features or 'all'}"
+        grid[name] = {"hidden_sizes": tuple(hidden_sizes), "features": features,
+                      "max_features": max_features or None}
+    return grid
+
+def _train_candidate(data_path: str, output_dir: str, params: dict) -> dict:
+    # Candidates train side by side, one core each
+    torch.set_num_threads(1)
+    manifest = train_model_version(data_path, output_dir, verbose=False, **params)
+    return {"accuracy": manifest["metrics"]["test_accuracy"], "n_features": manifest["metrics"]["n_features"]}
+
+def pareto_front(results: list) -> set:
+    """Names of candidates that no other candidate beats on both accuracy and latency"""
+    front = set()
+    for r in results:
+        dominated = any(
+            o["accuracy"] >= r["accuracy"] and o["single_row_p50_ms"] <= r["single_row_p50_ms"]
+            and (o["accuracy"] > r["accuracy"] or o["single_row_p50_ms"] < r["single_row_p50_ms"])
+            for o in results
+        )
+        if not dominated:
+            front.add(r["name"])
+    return front
+
+def run_sweep(data_path: str, sweep_dir: str, grid: dict, workers: int, **train_params) -> list:
+    """Train every candidate in a process pool, then time each exported IR one at a time"""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_train_candidate, data_path, os.path.join(sweep_dir, name), dict(train_params, **params)): name
+            for name, params in grid.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"[ERROR] Candidate {name} failed: {e}")
+                continue
+            print(f"[INFO] {name}: accuracy {result['accuracy']:.4f}")
+            results.append(dict(result, name=name, dir=os.path.join(sweep_dir, name), **grid[name]))
+
+    texts, _ = load_dataset(data_path)
+    # Sequential so candidates don't compete for cores while being timed
+    for result in results:
+        featurizer = ModelBundle.load(os.path.join(result["dir"], BUNDLE_FILE)).featurizer()
+        latency = measure_latency(os.path.join(result["dir"], XML_FILE), os.path.join(result["dir"], BIN_FILE),
+                                  featurizer.transform(texts))
+        result.update(single_row_p50_ms=latency["single_row_p50"], single_row_p95_ms=latency["single_row_p95"],
+                      batch_p50_ms=latency["batch_p50"])
+    front = pareto_front(results)
+    for result in results:
+        result["pareto"] = result["name"] in front
+    return sorted(results, key=lambda r: (r["single_row_p50_ms"], -r["accuracy"]))
+
+_TABLE_COLUMNS = ["name", "pareto", "accuracy", "single_row_p50_ms", "single_row_p95_ms", "batch_p50_ms",
+                  "n_features", "hidden_sizes", "features", "max_features", "dir"]
+
+def write_pareto_table(results: list, path: str):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=_TABLE_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow(dict(result, hidden_sizes="-".join(map(str, result["hidden_sizes"]))))
+
+def fastest_meeting(results: list, min_accuracy: float):
+    """Lowest-latency candidate at or above ``min_accuracy``, or None"""
+    passing = [r for r in results if r["accuracy"] >= min_accuracy]
+    return min(passing, key=lambda r: r["single_row_p50_ms"]) if passing else None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the symptom classifier and write a model version")
+    parser.add_argument("--data", default=SYMPTOM_CSV_PATH, help="symptoms/disease training CSV")
+    parser.add_argument("--version", default=datetime.now().strftime("v%Y%m%d-%H%M%S"),
+                        help="model version name (directory under --models-root)")
+    parser.add_argument("--models-root", default=MODELS_ROOT)
+    parser.add_argument("--hidden-sizes", default="64,32", help="comma-separated hidden layer sizes")
+    parser.add_argument("--dropout", type=float, default=0.3)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--opset", type=int, default=11)
+    parser.add_argument("--no-fp16", action="store_true", help="keep fp32 weights in the IR")
+    parser.add_argument("--int8", action="store_true", help="also write an INT8 quantized IR and its report")
+    parser.add_argument("--features", choices=FEATURE_TYPES, default="tfidf")
+    parser.add_argument("--max-features", type=int, default=0, help="prune the vocabulary to this many terms (0 keeps all)")
+    parser.add_argument("--min-df", type=int, default=1, help="drop terms in fewer rows than this")
+    parser.add_argument("--activate", action="store_true", help="make this the ACTIVE version")
+
+    sweep = parser.add_argument_group("sweep mode")
+    sweep.add_argument("--sweep", action="store_true", help="train a grid of candidates instead of one model")
+    sweep.add_argument("--sweep-hidden", default="64,32;32;128,64",
+                       help="semicolon-separated hidden size lists")
+    sweep.add_argument("--sweep-features", default="tfidf,binary")
+    sweep.add_argument("--sweep-max-features", default="0", help="comma-separated vocabulary sizes (0 keeps all)")
+    sweep.add_argument("--sweep-dir", help="candidate output directory (default: <models-root>/sweeps/<timestamp>)")
+    sweep.add_argument("--workers", type=int, default=os.cpu_count(), help="training processes")
+    sweep.add_argument("--min-accuracy", type=float, default=0.95, help="accuracy bar for picking a candidate")
+    sweep.add_argument("--promote", action="store_true",
+                       help="copy the fastest candidate meeting --min-accuracy to --version")
+    return parser.parse_args()
+
+def _parse_sizes(text: str) -> tuple:
+    return tuple(int(size) for size in text.split(",") if size.strip())
+
+def main_sweep(args):
+    sweep_dir = args.sweep_dir or os.path.join(args.models_root, "sweeps", datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(sweep_dir, exist_ok=True)
+    grid = sweep_grid(
+        [_parse_sizes(sizes) for sizes in args.sweep_hidden.split(";") if sizes.strip()],
+        [features.strip() for features in args.sweep_features.split(",") if features.strip()],
+        [int(size) for size in args.sweep_max_features.split(",") if size.strip()],
+    )
+    print(f"[INFO] Training {len(grid)} candidates with {args.workers} workers in {sweep_dir}")
+    results = run_sweep(args.data, sweep_dir, grid, args.workers, dropout=args.dropout, epochs=args.epochs,
+                        batch_size=args.batch_size, lr=args.lr, test_size=args.test_size, seed=args.seed,
+                        opset=args.opset, compress_to_fp16=not args.no_fp16, min_df=args.min_df)
+    table_path = os.path.join(sweep_dir, "pareto.csv")
+    write_pareto_table(results, table_path)
+
+    print(f"\n{'candidate':<28} {'pareto':<7} {'accuracy':>8} {'p50 ms':>8} {'batch ms':>9}")
+    for r in results:
+        print(f"{r['name']:<28} {'*' if r['pareto'] else '':<7} {r['accuracy']:>8.4f} "
+              f"{r['single_row_p50_ms']:>8.4f} {r['batch_p50_ms']:>9.4f}")
+    print(f"\n✅ Pareto table written to: {table_path}")
+
+    best = fastest_meeting(results, args.min_accuracy)
+    if best is None:
+        print(f"[WARNING] No candidate reached accuracy {args.min_accuracy}")
+        return
+    print(f"Fastest candidate with accuracy >= {args.min_accuracy}: {best['name']}")
+    if args.promote:
+        output_dir = os.path.join(args.models_root, args.version)
+        shutil.copytree(best["dir"], output_dir)
+        print(f"✅ {best['name']} promoted to model {args.version}: {output_dir}")
+        if args.activate:
+            _activate(args)
+
+def _activate(args):
+    if os.path.abspath(args.models_root) != os.path.abspath(MODELS_ROOT):
+        print("[WARNING] --activate only applies to the backend's models directory")
+    else:
+        set_active_version(args.version)
+        print(f"✅ Active model version: {args.version}")
+
+def main(args):
+    output_dir = os.path.join(args.models_root, args.version)
+    manifest = train_model_version(
+        args.data,
+        output_dir,
+        hidden_sizes=tuple(int(size) for size in args.hidden_sizes.split(",") if size),
+        dropout=args.dropout,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        lr=args.lr,
+        test_size=args.test_size,
+        seed=args.seed,
+        opset=args.opset,
+        compress_to_fp16=not args.no_fp16,
+        int8=args.int8,
+        features=args.features,
+        max_features=args.max_features or None,
+        min_df=args.min_df,
+    )
+    print(f"✅ Model {args.version} written to: {output_dir}")
+    print(json.dumps(manifest["metrics"], indent=2))
+    if args.activate:
+        _activate(args)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sweep:
+        main_sweep(args)
+    else:
+        main(args)
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# The backend is imported as the top-level ``backend`` package, as ``python -m backend.X`` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
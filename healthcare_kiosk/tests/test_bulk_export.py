@@ -0,0 +1,43 @@
+# tests/test_bulk_export.py
+"""An export reads one snapshot, whatever is written while it streams"""
+import json
+from datetime import datetime
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from backend.database import models
+from backend.database.bulk_export import stream_export
+from backend.database.database import create_db_engine, init_db
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    # WAL, so a writer can commit while the export reads; healthcare.db is never touched
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'export.db'}", profile="performance")
+    init_db(db_engine)
+    with db_engine.begin() as connection:
+        connection.execute(insert(models.Patient), [
+            {"aadhaar": f"90000000000{i}", "name": f"Patient {i}", "age": 40, "gender": "Female"} for i in range(3)
+        ])
+        connection.execute(insert(models.Vitals), [
+            {"patient_id": 1, "height_cm": 170, "weight_kg": 70, "blood_pressure": "120/80", "pulse": 70,
+             "bmi": 24.2, "timestamp": datetime(2025, 1, 1)}
+        ])
+    yield db_engine
+    db_engine.dispose()
+
+def test_rows_written_mid_export_are_not_exported(db_engine):
+    chunks = stream_export("all", yield_per=1, session_factory=sessionmaker(bind=db_engine))
+    records = [json.loads(next(chunks))]
+    assert records[0]["type"] == "patient"
+
+    # Committed on another connection after the export has started reading
+    with db_engine.begin() as connection:
+        connection.execute(insert(models.Vitals), {
+            "patient_id": 2, "height_cm": 160, "weight_kg": 55, "blood_pressure": "110/70", "pulse": 65,
+            "bmi": 21.5, "timestamp": datetime(2025, 1, 2)
+        })
+
+    records += [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [record["type"] for record in records] == ["patient"] * 3 + ["vitals"]
+    assert records[-1]["patient_id"] == 1
@@ -0,0 +1,32 @@
+# tests/test_featurizer.py
+"""The NumPy TF-IDF featurizer must match the fitted sklearn vectorizer exactly"""
+import csv
+import os
+import joblib
+import pytest
+from backend.featurizer import (
+    FEATURIZER_PATH, MODEL_DIR, SYMPTOM_CSV_PATH, VECTORIZER_PATH, TfidfFeaturizer, check_parity,
+)
+from backend.model_bundle import BUNDLE_FILE, ModelBundle
+
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    return joblib.load(VECTORIZER_PATH)
+
+@pytest.fixture(scope="module")
+def texts():
+    with open(SYMPTOM_CSV_PATH, newline='', encoding='utf-8') as f:
+        return [row["symptoms"] for row in csv.DictReader(f)]
+
+def _exported():
+    return TfidfFeaturizer.load(FEATURIZER_PATH)
+
+def _bundled():
+    # The featurizer the served model actually uses
+    return ModelBundle.load(os.path.join(MODEL_DIR, BUNDLE_FILE)).featurizer()
+
+@pytest.mark.parametrize("load", [_exported, _bundled], ids=["featurizer.npz", BUNDLE_FILE])
+def test_featurizer_matches_vectorizer(load, vectorizer, texts):
+    assert texts, f"no rows in {SYMPTOM_CSV_PATH}"
+    assert check_parity(load(), vectorizer, texts) == 0
@@ -0,0 +1,22 @@
+# tests/test_query_plans.py
+"""Every hot query in query_plans.CHECKS must be served by its index"""
+import pytest
+from backend.database.database import create_db_engine, init_db
+from backend.database.query_plans import CHECKS, query_plan
+
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    # A scratch database migrated to head; healthcare.db is never touched
+    db_engine = create_db_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    init_db(db_engine)
+    with db_engine.connect() as connection:
+        yield connection
+    db_engine.dispose()
+
+@pytest.mark.parametrize("name", list(CHECKS))
+def test_query_uses_index(connection, name):
+    statement, index = CHECKS[name]
+    plan = query_plan(connection, statement)
+    # "USING INDEX ix" or "USING COVERING INDEX ix"
+    assert any(f"INDEX {index}" in line for line in plan), f"{name}: expected {index}, plan: {plan}"